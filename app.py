@@ -2,6 +2,10 @@ import streamlit as st
 import subprocess
 import os
 import time
+from precision import GRID_SIZE_ENV, sliver_reports
+from crs import TARGET_CRS_ENV, parse_target_crs
+from main import LAYERS, resolve_layers
+from profiling import PROFILE_ENV, PROFILE_MEMORY_ENV
 
 def run_script(script_name, *args):
     command = ['python', script_name] + list(args)
@@ -12,35 +16,63 @@ def run_script(script_name, *args):
     if result.returncode != 0:
         return f"Error running {script_name}: {result.stderr}"
     else:
-        return f"Successfully ran {script_name} in {elapsed_time:.2f} seconds"
+        return "\n".join([f"Successfully ran {script_name} in {elapsed_time:.2f} seconds"] +
+                         [f"  {line}" for line in sliver_reports(result.stdout)])
 
-def process_files(xml_file, output_path):
+def process_files(xml_file, output_path, nutflu_mode="overlay", grid_size=0.0, export_tiles=False, target_crs="", selected_layers=LAYERS, profile=False, profile_memory=False):
     # Define file paths
     bez_dict_file = "bez_dict.json"
     flurstueck_shapefile = os.path.join(output_path, "flurstueck.shp")
     nutzung_shapefile = os.path.join(output_path, "nutzung.shp")
     nutzung_flurstueck_shapefile = os.path.join(output_path, "nutzungFlurstueck.shp")
+    nutzung_flurstueck_table = os.path.join(output_path, "nutzungFlurstueck.csv")
     gebauede_bauwerk_shapefile = os.path.join(output_path, "gebauedeBauwerk.shp")
     verwaltungs_einheit_shapefile = os.path.join(output_path, "verwaltungsEinheit.shp")
     kataster_bezirk_shapefile = os.path.join(output_path, "katasterBezirk.shp")
+    vector_tiles = os.path.join(output_path, "alkis.mbtiles")
+
+    # Validate the target CRSs once, before any stage runs
+    target_epsgs = parse_target_crs(target_crs)
 
     # Ensure the output directory exists
     os.makedirs(output_path, exist_ok=True)
 
-    # Run scripts in the correct order
+    # Scripts read the precision grid, target CRSs and profiling directory from the environment
+    os.environ[GRID_SIZE_ENV] = str(grid_size)
+    os.environ[TARGET_CRS_ENV] = ','.join(str(epsg) for epsg in target_epsgs)
+    os.environ[PROFILE_ENV] = os.path.abspath(os.path.join(output_path, "profile")) if profile else ""
+    os.environ[PROFILE_MEMORY_ENV] = "1" if profile_memory else "0"
+
+    # Run scripts in the correct order, skipping the stages of unused layers
+    layers = resolve_layers(selected_layers)
     results = []
-    results.append(run_script('flurstueck.py', xml_file, flurstueck_shapefile))
-    results.append(f"Generated: {flurstueck_shapefile}")
-    results.append(run_script('nutzung.py', xml_file, bez_dict_file, nutzung_shapefile))
-    results.append(f"Generated: {nutzung_shapefile}")
-    results.append(run_script('nutflu.py', flurstueck_shapefile, nutzung_shapefile, nutzung_flurstueck_shapefile))
-    results.append(f"Generated: {nutzung_flurstueck_shapefile}")
-    results.append(run_script('guby.py', xml_file, gebauede_bauwerk_shapefile))
-    results.append(f"Generated: {gebauede_bauwerk_shapefile}")
-    results.append(run_script('ver.py', flurstueck_shapefile, xml_file, verwaltungs_einheit_shapefile))
-    results.append(f"Generated: {verwaltungs_einheit_shapefile}")
-    results.append(run_script('kat.py', flurstueck_shapefile, kataster_bezirk_shapefile))
-    results.append(f"Generated: {kataster_bezirk_shapefile}")
+    if 'flurstueck' in layers:
+        results.append(run_script('flurstueck.py', xml_file, flurstueck_shapefile))
+        results.append(f"Generated: {flurstueck_shapefile}")
+    if 'nutzung' in layers:
+        results.append(run_script('nutzung.py', xml_file, bez_dict_file, nutzung_shapefile))
+        results.append(f"Generated: {nutzung_shapefile}")
+    if 'nutzungFlurstueck' in layers:
+        if nutflu_mode == "stats":
+            results.append(run_script('nutflu.py', flurstueck_shapefile, nutzung_shapefile, nutzung_flurstueck_table, 'stats'))
+            results.append(f"Generated: {nutzung_flurstueck_table}")
+        else:
+            results.append(run_script('nutflu.py', flurstueck_shapefile, nutzung_shapefile, nutzung_flurstueck_shapefile))
+            results.append(f"Generated: {nutzung_flurstueck_shapefile}")
+    if 'gebauedeBauwerk' in layers:
+        results.append(run_script('guby.py', xml_file, gebauede_bauwerk_shapefile))
+        results.append(f"Generated: {gebauede_bauwerk_shapefile}")
+    if 'verwaltungsEinheit' in layers:
+        results.append(run_script('ver.py', flurstueck_shapefile, xml_file, verwaltungs_einheit_shapefile))
+        results.append(f"Generated: {verwaltungs_einheit_shapefile}")
+    if 'katasterBezirk' in layers:
+        results.append(run_script('kat.py', flurstueck_shapefile, kataster_bezirk_shapefile))
+        results.append(f"Generated: {kataster_bezirk_shapefile}")
+    tile_layers = [shapefile for layer, shapefile in [('flurstueck', flurstueck_shapefile), ('nutzung', nutzung_shapefile),
+                                                      ('gebauedeBauwerk', gebauede_bauwerk_shapefile)] if layer in layers]
+    if export_tiles and tile_layers:
+        results.append(run_script('tiles.py', vector_tiles, *tile_layers))
+        results.append(f"Generated: {vector_tiles}")
 
     results.append("CONVERSION COMPLETED")
 
@@ -56,6 +88,27 @@ xml_file = st.file_uploader("Input XML File", type=["xml"])
 # Text input for output path
 output_path = st.text_input("Output Path", placeholder="Enter the output directory path")
 
+# Layers to build, dependencies are added automatically
+selected_layers = st.multiselect("Layers", LAYERS, default=LAYERS)
+
+# Parcel / land-use output: full overlay layer or area statistics table only
+nutflu_mode = st.selectbox("Parcel / Land-use Output", ["overlay", "stats"])
+
+# Precision grid in metres, 0 keeps full double precision
+grid_size = st.number_input("Precision Grid (m)", min_value=0.0, value=0.0, step=0.001, format="%.3f")
+
+# Additional output CRSs as EPSG codes
+target_crs = st.text_input("Additional Target CRS", placeholder="e.g. 4326,EPSG:25833")
+
+# Optional vector tile export for web display
+export_tiles = st.checkbox("Export Vector Tiles (MBTiles)")
+
+# Opt-in profiling, dumps are written to <output path>/profile
+profile = st.checkbox("Profile Conversion Stages")
+
+# Allocation tracing runs as its own profiling pass so it does not distort the timings
+profile_memory = st.checkbox("Trace Allocations Instead of Timing", disabled=not profile)
+
 # Button to start the conversion process
 if st.button("Start Conversion"):
     if xml_file is not None and output_path:
@@ -69,7 +122,7 @@ if st.button("Start Conversion"):
                 f.write(xml_file.getbuffer())
 
             # Process the files
-            result = process_files(xml_file_path, output_path)
+            result = process_files(xml_file_path, output_path, nutflu_mode, grid_size, export_tiles, target_crs, selected_layers, profile, profile_memory)
             st.text(result)
         except Exception as e:
             st.error(f"An error occurred: {e}")
@@ -0,0 +1,76 @@
+import json
+import sys
+import xml.etree.ElementTree as ET
+
+# Generate codelists.json from the official AdV NAS application schema (e.g. NAS 6.0 aaa.xsd)
+XSD = '{http://www.w3.org/2001/XMLSchema}'
+
+# Local name of a tag or a prefixed type reference, e.g. 'adv:AX_Gebaeudefunktion' -> 'AX_Gebaeudefunktion'
+def local_name(name):
+    return name.rsplit('}', 1)[-1].rsplit(':', 1)[-1]
+
+# Label of an enumeration value from its annotation; names in appinfo win over documentation
+def enumeration_label(enumeration):
+    annotation = enumeration.find(f'{XSD}annotation')
+    if annotation is None:
+        return None
+    texts = {}
+    for elem in annotation.iter():
+        if elem.text and elem.text.strip():
+            texts.setdefault(local_name(elem.tag), elem.text.strip().splitlines()[0].strip())
+    for key in ('name', 'label', 'wert', 'documentation'):
+        if key in texts:
+            return texts[key]
+    return next(iter(texts.values()), None)
+
+# Code -> label tables of all enumerated simple types in the schema
+def read_enumerations(root):
+    enumerations = {}
+    for simple_type in root.iter(f'{XSD}simpleType'):
+        name = simple_type.get('name')
+        values = simple_type.findall(f'./{XSD}restriction/{XSD}enumeration')
+        if name and values:
+            enumerations[name] = {value.get('value'): enumeration_label(value) or value.get('value') for value in values}
+    return enumerations
+
+# Feature type name of every complex type, taken from the global element declarations
+def read_feature_types(root):
+    feature_types = {}
+    for element in root.findall(f'./{XSD}element'):
+        if element.get('name') and element.get('type'):
+            feature_types[local_name(element.get('type'))] = element.get('name')
+    return feature_types
+
+# Codelists keyed by feature type and attribute, e.g. {'AX_Wald': {'vegetationsmerkmal': {'1100': 'Laubholz'}}}
+def build_codelists(xsd_files):
+    roots = [ET.parse(xsd_file).getroot() for xsd_file in xsd_files]
+    enumerations = {name: codes for root in roots for name, codes in read_enumerations(root).items()}
+    feature_types = {name: feature for root in roots for name, feature in read_feature_types(root).items()}
+
+    codelists = {}
+    for root in roots:
+        for complex_type in root.iter(f'{XSD}complexType'):
+            type_name = complex_type.get('name')
+            if not type_name:
+                continue
+            feature_type = feature_types.get(type_name, type_name[:-4] if type_name.endswith('Type') else type_name)
+            for element in complex_type.iter(f'{XSD}element'):
+                codes = enumerations.get(local_name(element.get('type', '')))
+                if element.get('name') and codes:
+                    codelists.setdefault(feature_type, {})[element.get('name')] = codes
+
+    return dict(sorted(codelists.items()))
+
+# Example usage
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python build_codelists.py <output codelists.json> <NAS schema .xsd> [<more .xsd> ...]")
+        sys.exit(1)
+
+    output_file = sys.argv[1]
+    codelists = build_codelists(sys.argv[2:])
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(codelists, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+    count = sum(len(attributes) for attributes in codelists.values())
+    print(f"{count} codelists of {len(codelists)} feature types written to '{output_file}'.")
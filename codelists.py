@@ -0,0 +1,523 @@
+import json
+import os
+import re
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+# codelists.json generated from the official AdV schema by build_codelists.py; when present
+# it replaces the hand-maintained tables below, which only cover the common codes
+GENERATED_CODELISTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'codelists.json')
+
+# AX_Gebaeudefunktion (GeoInfoDok 6.0, hand-maintained subset)
+GEBAEUDEFUNKTION = {
+    '1000': 'Wohngebäude',
+    '1010': 'Wohnhaus',
+    '1020': 'Wohnheim',
+    '1021': 'Kinderheim',
+    '1022': 'Seniorenheim',
+    '1023': 'Schwesternwohnheim',
+    '1024': 'Studenten-, Schülerwohnheim',
+    '1025': 'Schullandheim',
+    '1100': 'Gemischt genutztes Gebäude mit Wohnen',
+    '1110': 'Wohngebäude mit Gemeinbedarf',
+    '1120': 'Wohngebäude mit Handel und Dienstleistungen',
+    '1121': 'Wohn- und Verwaltungsgebäude',
+    '1122': 'Wohn- und Bürogebäude',
+    '1123': 'Wohn- und Geschäftsgebäude',
+    '1130': 'Wohngebäude mit Gewerbe und Industrie',
+    '1131': 'Wohn- und Betriebsgebäude',
+    '1210': 'Land- und forstwirtschaftliches Wohngebäude',
+    '1220': 'Land- und forstwirtschaftliches Wohn- und Betriebsgebäude',
+    '1221': 'Bauernhaus',
+    '1222': 'Wohn- und Wirtschaftsgebäude',
+    '1223': 'Forsthaus',
+    '1310': 'Gebäude zur Freizeitgestaltung',
+    '1311': 'Ferienhaus',
+    '1312': 'Wochenendhaus',
+    '1313': 'Gartenhaus',
+    '2000': 'Gebäude für Wirtschaft oder Gewerbe',
+    '2010': 'Gebäude für Handel und Dienstleistungen',
+    '2020': 'Bürogebäude',
+    '2030': 'Kreditinstitut',
+    '2040': 'Versicherung',
+    '2050': 'Geschäftsgebäude',
+    '2051': 'Kaufhaus',
+    '2052': 'Einkaufszentrum',
+    '2053': 'Markthalle',
+    '2054': 'Laden',
+    '2055': 'Kiosk',
+    '2056': 'Apotheke',
+    '2060': 'Messehalle',
+    '2070': 'Gebäude für Beherbergung',
+    '2071': 'Hotel, Motel, Pension',
+    '2072': 'Jugendherberge',
+    '2073': 'Hütte (mit Übernachtungsmöglichkeit)',
+    '2074': 'Campingplatzgebäude',
+    '2080': 'Gebäude für Bewirtung',
+    '2081': 'Gaststätte, Restaurant',
+    '2082': 'Hütte (ohne Übernachtungsmöglichkeit)',
+    '2083': 'Kantine',
+    '2090': 'Freizeit- und Vergnügungsstätte',
+    '2091': 'Festsaal',
+    '2092': 'Kino',
+    '2093': 'Kegel-, Bowlinghalle',
+    '2094': 'Spielkasino',
+    '2100': 'Gebäude für Gewerbe und Industrie',
+    '2110': 'Produktionsgebäude',
+    '2111': 'Fabrik',
+    '2112': 'Betriebsgebäude',
+    '2113': 'Brauerei',
+    '2114': 'Brennerei',
+    '2120': 'Werkstatt',
+    '2121': 'Sägewerk',
+    '2130': 'Tankstelle',
+    '2131': 'Waschstraße, Waschanlage, Waschhalle',
+    '2140': 'Gebäude für Vorratshaltung',
+    '2141': 'Kühlhaus',
+    '2142': 'Speichergebäude',
+    '2143': 'Lagerhalle, Lagerschuppen, Lagerhaus',
+    '2150': 'Speditionsgebäude',
+    '2160': 'Gebäude für Forschungszwecke',
+    '2170': 'Gebäude für Grundstoffgewinnung',
+    '2171': 'Bergwerk',
+    '2172': 'Saline',
+    '2180': 'Gebäude für betriebliche Sozialeinrichtung',
+    '2200': 'Sonstiges Gebäude für Gewerbe und Industrie',
+    '2210': 'Mühle',
+    '2211': 'Windmühle',
+    '2212': 'Wassermühle',
+    '2213': 'Schöpfwerk',
+    '2220': 'Wetterstation',
+    '2310': 'Gebäude für Handel und Dienstleistung mit Wohnen',
+    '2320': 'Gebäude für Gewerbe und Industrie mit Wohnen',
+    '2400': 'Betriebsgebäude zu Verkehrsanlagen (allgemein)',
+    '2410': 'Betriebsgebäude für Straßenverkehr',
+    '2411': 'Straßenmeisterei',
+    '2412': 'Wartehalle',
+    '2420': 'Betriebsgebäude für Schienenverkehr',
+    '2421': 'Bahnwärterhaus',
+    '2422': 'Lokschuppen, Wagenhalle',
+    '2423': 'Stellwerk, Blockstelle',
+    '2424': 'Betriebsgebäude des Güterbahnhofs',
+    '2430': 'Betriebsgebäude für Flugverkehr',
+    '2431': 'Flugzeughalle',
+    '2440': 'Betriebsgebäude für Schiffsverkehr',
+    '2441': 'Werft (Halle)',
+    '2442': 'Dock (Halle)',
+    '2443': 'Betriebsgebäude zur Schleuse',
+    '2444': 'Bootshaus',
+    '2450': 'Betriebsgebäude zur Seilbahn',
+    '2451': 'Spannwerk zur Drahtseilbahn',
+    '2460': 'Gebäude zum Parken',
+    '2461': 'Parkhaus',
+    '2462': 'Parkdeck',
+    '2463': 'Garage',
+    '2464': 'Fahrzeughalle',
+    '2465': 'Tiefgarage',
+    '2500': 'Gebäude zur Versorgung',
+    '2501': 'Gebäude zur Energieversorgung',
+    '2510': 'Gebäude zur Wasserversorgung',
+    '2511': 'Wasserwerk',
+    '2512': 'Pumpstation',
+    '2513': 'Wasserbehälter',
+    '2520': 'Gebäude zur Elektrizitätsversorgung',
+    '2521': 'Elektrizitätswerk',
+    '2522': 'Umspannwerk',
+    '2523': 'Umformer',
+    '2527': 'Reaktorgebäude',
+    '2528': 'Turbinenhaus',
+    '2529': 'Kesselhaus',
+    '2540': 'Gebäude für Fernmeldewesen',
+    '2560': 'Gebäude an unterirdischen Leitungen',
+    '2570': 'Gebäude zur Gasversorgung',
+    '2571': 'Gaswerk',
+    '2580': 'Heizwerk',
+    '2590': 'Gebäude zur Versorgungsanlage',
+    '2591': 'Pumpwerk (nicht für Wasserversorgung)',
+    '2600': 'Gebäude zur Entsorgung',
+    '2610': 'Gebäude zur Abwasserbeseitigung',
+    '2611': 'Gebäude der Kläranlage',
+    '2612': 'Toilette',
+    '2620': 'Gebäude zur Abfallbehandlung',
+    '2621': 'Müllbunker',
+    '2622': 'Gebäude zur Müllverbrennung',
+    '2623': 'Gebäude der Abfalldeponie',
+    '2700': 'Gebäude für Land- und Forstwirtschaft',
+    '2720': 'Land- und forstwirtschaftliches Betriebsgebäude',
+    '2721': 'Scheune',
+    '2723': 'Schuppen',
+    '2724': 'Stall',
+    '2726': 'Scheune und Stall',
+    '2727': 'Stall für Tiergroßhaltung',
+    '2728': 'Reithalle',
+    '2729': 'Wirtschaftsgebäude',
+    '2732': 'Almhütte',
+    '2735': 'Jagdhaus, Jagdhütte',
+    '2740': 'Treibhaus, Gewächshaus',
+    '2741': 'Treibhaus',
+    '2742': 'Gewächshaus, verschiebbar',
+    '3000': 'Gebäude für öffentliche Zwecke',
+    '3010': 'Verwaltungsgebäude',
+    '3011': 'Parlament',
+    '3012': 'Rathaus',
+    '3013': 'Post',
+    '3014': 'Zollamt',
+    '3015': 'Gericht',
+    '3016': 'Botschaft, Konsulat',
+    '3017': 'Kreisverwaltung',
+    '3018': 'Bezirksregierung',
+    '3019': 'Finanzamt',
+    '3020': 'Gebäude für Bildung und Forschung',
+    '3021': 'Allgemein bildende Schule',
+    '3022': 'Berufsbildende Schule',
+    '3023': 'Hochschulgebäude (Fachhochschule, Universität)',
+    '3024': 'Forschungsinstitut',
+    '3030': 'Gebäude für kulturelle Zwecke',
+    '3031': 'Schloss',
+    '3032': 'Theater, Oper',
+    '3033': 'Konzertgebäude',
+    '3034': 'Museum',
+    '3035': 'Rundfunk, Fernsehen',
+    '3036': 'Veranstaltungsgebäude',
+    '3037': 'Bibliothek, Bücherei',
+    '3038': 'Burg, Festung',
+    '3040': 'Gebäude für religiöse Zwecke',
+    '3041': 'Kirche',
+    '3042': 'Synagoge',
+    '3043': 'Kapelle',
+    '3044': 'Gemeindehaus',
+    '3045': 'Gotteshaus',
+    '3046': 'Moschee',
+    '3047': 'Tempel',
+    '3048': 'Kloster',
+    '3050': 'Gebäude für Gesundheitswesen',
+    '3051': 'Krankenhaus',
+    '3052': 'Heilanstalt, Pflegeanstalt, Pflegestation',
+    '3053': 'Ärztehaus, Poliklinik',
+    '3060': 'Gebäude für soziale Zwecke',
+    '3061': 'Jugendfreizeitheim',
+    '3062': 'Freizeit-, Vereinsheim, Dorfgemeinschafts-, Bürgerhaus',
+    '3063': 'Seniorenfreizeitstätte',
+    '3064': 'Obdachlosenheim',
+    '3065': 'Kinderkrippe, Kindergarten, Kindertagesstätte',
+    '3066': 'Asylbewerberheim',
+    '3070': 'Gebäude für Sicherheit und Ordnung',
+    '3071': 'Polizei',
+    '3072': 'Feuerwehr',
+    '3073': 'Kaserne',
+    '3074': 'Schutzbunker',
+    '3075': 'Justizvollzugsanstalt',
+    '3080': 'Friedhofsgebäude',
+    '3081': 'Trauerhalle',
+    '3082': 'Krematorium',
+    '3090': 'Empfangsgebäude',
+    '3091': 'Bahnhofsgebäude',
+    '3092': 'Flughafengebäude',
+    '3094': 'Gebäude zum U-Bahnhof',
+    '3095': 'Gebäude zum S-Bahnhof',
+    '3097': 'Gebäude zum Busbahnhof',
+    '3098': 'Empfangsgebäude Schifffahrt',
+    '3100': 'Gebäude für öffentliche Zwecke mit Wohnen',
+    '3200': 'Gebäude für Erholungszwecke',
+    '3210': 'Gebäude für Sportzwecke',
+    '3211': 'Sport-, Turnhalle',
+    '3212': 'Gebäude zum Sportplatz',
+    '3220': 'Badegebäude',
+    '3221': 'Hallenbad',
+    '3222': 'Gebäude im Freibad',
+    '3230': 'Gebäude im Stadion',
+    '3240': 'Gebäude für Kurbetrieb',
+    '3241': 'Badegebäude für medizinische Zwecke',
+    '3242': 'Sanatorium',
+    '3260': 'Gebäude im Zoo',
+    '3261': 'Empfangsgebäude des Zoos',
+    '3262': 'Aquarium, Terrarium, Voliere',
+    '3263': 'Tierschauhaus',
+    '3264': 'Stall im Zoo',
+    '3270': 'Gebäude im botanischen Garten',
+    '3271': 'Empfangsgebäude des botanischen Gartens',
+    '3272': 'Gewächshaus (Botanik)',
+    '3273': 'Pflanzenschauhaus',
+    '3280': 'Gebäude für andere Erholungseinrichtung',
+    '3281': 'Schutzhütte',
+    '3290': 'Touristisches Informationszentrum',
+    '9998': 'Nach Quellenlage nicht zu spezifizieren'
+}
+
+# AX_Bauwerksfunktion_SonstigesBauwerkOderSonstigeEinrichtung (GeoInfoDok 6.0, hand-maintained subset)
+BAUWERKSFUNKTION = {
+    '1610': 'Überdachung',
+    '1611': 'Carport',
+    '1620': 'Treppe',
+    '1630': 'Treppenunterkante',
+    '1640': 'Kellereingang',
+    '1650': 'Rampe',
+    '1700': 'Mauer',
+    '1701': 'Mauerkante, rechts',
+    '1702': 'Mauerkante, links',
+    '1703': 'Mauermitte',
+    '1720': 'Stützmauer',
+    '1721': 'Stützmauer, rechts',
+    '1722': 'Stützmauer, links',
+    '1723': 'Stützmauermitte',
+    '1740': 'Zaun',
+    '1750': 'Gedenkstätte',
+    '1760': 'Bildstock',
+    '1780': 'Brunnen',
+    '9999': 'Sonstiges'
+}
+
+# Nutzung codelists keyed by (feature type, attribute); the same code means different things
+# in different catalogues, e.g. vegetationsmerkmal 1100 of AX_Wald is Laubholz (GeoInfoDok 6.0, hand-maintained subset)
+NUTZUNG = {
+    ('AX_IndustrieUndGewerbeflaeche', 'funktion'): {
+        '1400': 'Handel und Dienstleistung',
+        '1410': 'Verwaltung, freie Berufe',
+        '1420': 'Bank, Kredit',
+        '1430': 'Versicherung',
+        '1440': 'Handel',
+        '1450': 'Ausstellung, Messe',
+        '1460': 'Beherbergung',
+        '1470': 'Restauration',
+        '1480': 'Vergnügung',
+        '1490': 'Gärtnerei',
+        '1700': 'Industrie und Gewerbe',
+        '1701': 'Gebäude- und Freifläche Industrie und Gewerbe',
+        '1710': 'Produktion',
+        '1720': 'Handwerk',
+        '1730': 'Tankstelle',
+        '1740': 'Lagerplatz',
+        '1750': 'Transport',
+        '1760': 'Forschung',
+        '1770': 'Grundstoff',
+        '1780': 'Betriebliche Sozialeinrichtung',
+        '1790': 'Werft',
+        '2500': 'Versorgungsanlage',
+        '2501': 'Gebäude- und Freifläche Versorgungsanlage',
+        '2502': 'Betriebsfläche Versorgungsanlage',
+        '2520': 'Wasserwerk',
+        '2521': 'Gebäude- und Freifläche Versorgungsanlage, Wasser',
+        '2522': 'Betriebsfläche Versorgungsanlage, Wasser',
+        '2530': 'Kraftwerk',
+        '2531': 'Gebäude- und Freifläche Versorgungsanlage, Elektrizität',
+        '2532': 'Betriebsfläche Versorgungsanlage, Elektrizität',
+        '2540': 'Umspannstation',
+        '2550': 'Raffinerie',
+        '2551': 'Gebäude- und Freifläche Versorgungsanlage, Öl',
+        '2552': 'Betriebsfläche Versorgungsanlage, Öl',
+        '2560': 'Gaswerk',
+        '2561': 'Gebäude- und Freifläche Versorgungsanlage, Gas',
+        '2562': 'Betriebsfläche Versorgungsanlage, Gas',
+        '2570': 'Heizwerk',
+        '2571': 'Gebäude- und Freifläche Versorgungsanlage, Wärme',
+        '2572': 'Betriebsfläche Versorgungsanlage, Wärme',
+        '2580': 'Funk- und Fernmeldeanlage',
+        '2581': 'Gebäude- und Freifläche Versorgungsanlage, Funk- und Fernmeldesystem',
+        '2582': 'Betriebsfläche Versorgungsanlage, Funk- und Fernmeldewesen',
+        '2600': 'Entsorgung',
+        '2601': 'Gebäude- und Freifläche Entsorgungsanlage',
+        '2602': 'Betriebsfläche, Entsorgungsanlage',
+        '2610': 'Kläranlage, Klärwerk',
+        '2611': 'Gebäude- und Freifläche Entsorgungsanlage, Abwasserbeseitigung',
+        '2612': 'Betriebsfläche, Entsorgungsanlage Abwasserbeseitigung',
+        '2620': 'Abfallbehandlungsanlage',
+        '2621': 'Gebäude- und Freifläche Entsorgungsanlage, Abfallbeseitigung',
+        '2622': 'Betriebsfläche, Entsorgungsanlage Abfallbeseitigung',
+        '2623': 'Betriebsfläche, Entsorgungsanlage Schlamm',
+        '2630': 'Deponie (oberirdisch)',
+        '2640': 'Deponie (untertägig)'
+    },
+    ('AX_FlaecheGemischterNutzung', 'funktion'): {
+        '2100': 'Gebäude- und Freifläche, Mischnutzung mit Wohnen',
+        '2110': 'Wohnen mit Öffentlich',
+        '2120': 'Wohnen mit Handel und Dienstleistungen',
+        '2130': 'Wohnen mit Gewerbe und Industrie',
+        '2140': 'Öffentlich mit Wohnen',
+        '2150': 'Handel und Dienstleistungen mit Wohnen',
+        '2160': 'Gewerbe und Industrie mit Wohnen',
+        '2700': 'Gebäude- und Freifläche Land- und Forstwirtschaft',
+        '2710': 'Betrieb',
+        '2720': 'Wohnen',
+        '2730': 'Wohnen und Betrieb',
+        '6800': 'Landwirtschaftliche Betriebsfläche',
+        '7600': 'Forstwirtschaftliche Betriebsfläche'
+    },
+    ('AX_FlaecheBesondererFunktionalerPraegung', 'funktion'): {
+        '1100': 'Öffentliche Zwecke',
+        '1110': 'Verwaltung',
+        '1120': 'Bildung und Forschung',
+        '1130': 'Kultur',
+        '1140': 'Religiöse Einrichtung',
+        '1150': 'Gesundheit, Kur',
+        '1160': 'Soziales',
+        '1170': 'Sicherheit und Ordnung',
+        '1200': 'Parken',
+        '1300': 'Historische Anlage',
+        '1310': 'Burg-, Festungsanlage',
+        '1320': 'Schlossanlage'
+    },
+    ('AX_SportFreizeitUndErholungsflaeche', 'funktion'): {
+        '4100': 'Sportanlage',
+        '4101': 'Gebäude- und Freifläche Erholung, Sport',
+        '4110': 'Golfplatz',
+        '4120': 'Sportplatz',
+        '4130': 'Rennbahn',
+        '4140': 'Reitplatz',
+        '4150': 'Schießanlage',
+        '4160': 'Eis-, Rollschuhbahn',
+        '4170': 'Tennisplatz',
+        '4200': 'Freizeitanlage',
+        '4210': 'Zoo',
+        '4211': 'Gebäude- und Freifläche, Zoologie',
+        '4220': 'Safaripark, Wildpark',
+        '4230': 'Freizeitpark',
+        '4240': 'Freilichttheater',
+        '4250': 'Freilichtmuseum',
+        '4260': 'Autokino, Freilichtkino',
+        '4270': 'Verkehrsübungsplatz',
+        '4280': 'Hundeübungsplatz',
+        '4290': 'Modellflugplatz',
+        '4300': 'Erholungsfläche',
+        '4301': 'Gebäude- und Freifläche Erholung',
+        '4310': 'Wochenend- und Ferienhausfläche',
+        '4320': 'Schwimmbad, Freibad',
+        '4321': 'Gebäude- und Freifläche, Bad',
+        '4330': 'Campingplatz',
+        '4331': 'Gebäude- und Freifläche, Camping',
+        '4400': 'Grünanlage',
+        '4410': 'Grünfläche',
+        '4420': 'Park',
+        '4430': 'Botanischer Garten',
+        '4431': 'Gebäude- und Freifläche, Erholung, Botanik',
+        '4440': 'Kleingarten',
+        '4450': 'Wochenendplatz',
+        '4460': 'Garten',
+        '4470': 'Spielplatz, Bolzplatz'
+    },
+    ('AX_Friedhof', 'funktion'): {
+        '9401': 'Gebäude- und Freifläche Friedhof',
+        '9402': 'Friedhof (ohne Gebäude)',
+        '9403': 'Friedhof (Park)',
+        '9404': 'Historischer Friedhof'
+    },
+    ('AX_Strassenverkehr', 'funktion'): {
+        '2311': 'Gebäude- und Freifläche zu Verkehrsanlagen, Straße',
+        '2312': 'Verkehrsbegleitfläche Straße',
+        '2313': 'Straßenentwässerungsanlage',
+        '5130': 'Fußgängerzone'
+    },
+    ('AX_Weg', 'funktion'): {
+        '5210': 'Fahrweg',
+        '5211': 'Hauptwirtschaftsweg',
+        '5212': 'Wirtschaftsweg',
+        '5220': 'Fußweg',
+        '5230': 'Gang',
+        '5240': 'Radweg',
+        '5250': 'Rad- und Fußweg',
+        '5260': 'Reitweg'
+    },
+    ('AX_Platz', 'funktion'): {
+        '5310': 'Parkplatz',
+        '5320': 'Rastplatz',
+        '5330': 'Raststätte',
+        '5340': 'Marktplatz',
+        '5350': 'Festplatz'
+    },
+    ('AX_Bahnverkehr', 'funktion'): {
+        '2321': 'Gebäude- und Freifläche zu Verkehrsanlagen, Schiene',
+        '2322': 'Verkehrsbegleitfläche Bahnverkehr'
+    },
+    ('AX_Fliessgewaesser', 'funktion'): {
+        '8200': 'Fluss',
+        '8210': 'Altwasser',
+        '8220': 'Altarm',
+        '8230': 'Flussmündungstrichter',
+        '8300': 'Kanal',
+        '8400': 'Graben',
+        '8410': 'Fleet',
+        '8500': 'Bach'
+    },
+    ('AX_StehendesGewaesser', 'funktion'): {
+        '8610': 'See',
+        '8620': 'Teich',
+        '8630': 'Stausee',
+        '8631': 'Speicherbecken',
+        '8640': 'Baggersee',
+        '9999': 'Sonstiges'
+    },
+    ('AX_UnlandVegetationsloseFlaeche', 'funktion'): {
+        '1000': 'Vegetationslose Fläche',
+        '1100': 'Gewässerbegleitfläche',
+        '1110': 'Bebaute Gewässerbegleitfläche',
+        '1120': 'Unbebaute Gewässerbegleitfläche'
+    },
+    ('AX_Landwirtschaft', 'vegetationsmerkmal'): {
+        '1010': 'Ackerland',
+        '1011': 'Streuobstacker',
+        '1012': 'Hopfen',
+        '1013': 'Spargel',
+        '1020': 'Grünland',
+        '1021': 'Streuobstwiese',
+        '1030': 'Gartenland',
+        '1031': 'Baumschule',
+        '1040': 'Weingarten',
+        '1050': 'Obstplantage',
+        '1051': 'Obstbaumplantage',
+        '1052': 'Obststrauchplantage',
+        '1200': 'Brachland'
+    },
+    ('AX_Wald', 'vegetationsmerkmal'): {
+        '1100': 'Laubholz',
+        '1200': 'Nadelholz',
+        '1300': 'Laub- und Nadelholz',
+        '1310': 'Laubwald mit Nadelholz',
+        '1320': 'Nadelwald mit Laubholz'
+    },
+    ('AX_Gehoelz', 'funktion'): {
+        '1000': 'Windschutz'
+    },
+    ('AX_Gehoelz', 'vegetationsmerkmal'): {
+        '1400': 'Latschenkiefer'
+    }
+}
+
+# Load a JSON codelist (e.g. codelists.json) once per process
+@lru_cache(maxsize=None)
+def load_codelist(codelist_file):
+    with open(codelist_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+# Readable nutzart for a feature type, e.g. 'AX_StehendesGewaesser' -> 'Stehendes Gewaesser'
+@lru_cache(maxsize=None)
+def nutzart_label(tag):
+    return ' '.join(re.findall('[A-Z][^A-Z]*', tag[3:]))
+
+# Map a whole column of codes to labels; absent codes become null, unknown codes missing
+def map_codes(codes, codelist, missing='Unbekannt', null='<null>'):
+    codes = pd.Series(codes, dtype=object)
+    labels = codes.map(codelist).fillna(missing)
+    labels[codes.isna() | (codes == '')] = null
+    return labels.to_numpy()
+
+# Map Nutzung codes per (feature type, attribute) catalogue; pairs without one get the missing label,
+# since a flat code list would mix up codes of different catalogues
+def map_nutzung_codes(feature_types, attributes, codes, missing='Unbekannt', null='<null>'):
+    frame = pd.DataFrame({'feature_type': feature_types, 'attribute': attributes, 'code': codes}, dtype=object)
+    labels = np.full(len(frame), null, dtype=object)
+    for key, group in frame.groupby(['feature_type', 'attribute'], sort=False):
+        labels[group.index] = map_codes(group['code'], NUTZUNG.get(key, {}), missing, null)
+    return labels
+
+# Codelists keyed by (feature type, attribute) from codelists.json, empty when it was not generated
+def load_generated_codelists(codelist_file=GENERATED_CODELISTS):
+    if not os.path.exists(codelist_file):
+        return {}
+    return {(feature_type, attribute): codes for feature_type, attributes in load_codelist(codelist_file).items()
+            for attribute, codes in attributes.items()}
+
+# Prefer the generated catalogues over the hand-maintained subsets
+GENERATED = load_generated_codelists()
+GEBAEUDEFUNKTION = GENERATED.get(('AX_Gebaeude', 'gebaeudefunktion'), GEBAEUDEFUNKTION)
+BAUWERKSFUNKTION = GENERATED.get(('AX_SonstigesBauwerkOderSonstigeEinrichtung', 'bauwerksfunktion'), BAUWERKSFUNKTION)
+NUTZUNG = {**NUTZUNG, **GENERATED}
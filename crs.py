@@ -0,0 +1,143 @@
+import mmap
+import os
+import re
+from functools import lru_cache
+import numpy as np
+import shapefile
+from pyproj import CRS, Transformer
+from pyproj.enums import WktVersion
+from pyproj.exceptions import CRSError
+from spatial_index import build_index
+
+# Environment variable with additional output CRSs as comma separated EPSG codes, e.g. "4326,25833"
+TARGET_CRS_ENV = 'NAS_TARGET_CRS'
+
+# CRS assumed when the NAS file does not name one
+DEFAULT_EPSG = 25832
+
+# Attribute encoding assumed when a shapefile has no .cpg (pyshp writes UTF-8)
+DEFAULT_ENCODING = 'UTF-8'
+
+# AdV srsName identifiers used in NAS files
+ADV_SRS_NAMES = {
+    'ETRS89_UTM32': 25832,
+    'ETRS89_UTM33': 25833,
+    'DE_DHDN_3GK2': 31466,
+    'DE_DHDN_3GK3': 31467,
+    'DE_DHDN_3GK4': 31468,
+    'DE_DHDN_3GK5': 31469
+}
+
+# Map an srsName (EPSG URN/URL or AdV identifier) to an EPSG code
+def epsg_from_srs_name(srs_name):
+    # Compound names like 'ETRS89_UTM32*DE_DHHN92_NH' carry the height system after the '*'
+    name = srs_name.split('*')[0]
+    if 'EPSG' in name:
+        codes = re.findall(r'\d+', name.split('EPSG')[-1])
+        return int(codes[-1]) if codes else None
+    return ADV_SRS_NAMES.get(name.rsplit(':', 1)[-1])
+
+# Detect the source CRS from the first srsName in the NAS file
+def detect_source_epsg(xml_file):
+    if os.path.getsize(xml_file) == 0:
+        return DEFAULT_EPSG
+    with open(xml_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        match = re.search(rb'srsName\s*=\s*["\']([^"\']+)["\']', mm)
+        srs_name = match.group(1).decode('utf-8') if match else None
+    epsg = epsg_from_srs_name(srs_name) if srs_name else None
+    return epsg or DEFAULT_EPSG
+
+# Read the CRS of an existing shapefile from its .prj
+def epsg_from_prj(shapefile_path):
+    prj_file = shapefile_path.replace('.shp', '.prj')
+    if not os.path.exists(prj_file):
+        return DEFAULT_EPSG
+    with open(prj_file) as prj:
+        return CRS.from_wkt(prj.read()).to_epsg() or DEFAULT_EPSG
+
+# Parse comma separated target CRSs ('4326', 'EPSG:4326', EPSG URNs or AdV names) into known EPSG codes
+def parse_target_crs(value):
+    targets = []
+    for code in value.replace(';', ',').split(','):
+        code = code.strip()
+        if not code:
+            continue
+        epsg = int(code) if code.isdigit() else epsg_from_srs_name(code)
+        try:
+            CRS.from_epsg(epsg)
+        except (CRSError, TypeError):
+            raise ValueError(f"invalid target CRS '{code}', expected an EPSG code such as 4326 or EPSG:25833")
+        targets.append(epsg)
+    return list(dict.fromkeys(targets))
+
+# Read the additional target CRSs from the environment
+def target_epsgs(source_epsg=None):
+    targets = parse_target_crs(os.environ.get(TARGET_CRS_ENV, ''))
+    return [epsg for epsg in targets if epsg != source_epsg]
+
+# Transformers are expensive to create, keep one per CRS pair
+@lru_cache(maxsize=None)
+def get_transformer(source_epsg, target_epsg):
+    return Transformer.from_crs(source_epsg, target_epsg, always_xy=True)
+
+# Path of the copy of an output in another CRS
+def target_path(output_shapefile, epsg):
+    return output_shapefile.replace('.shp', f'_{epsg}.shp')
+
+# Write the .prj file for a shapefile
+def write_prj(output_shapefile, epsg):
+    with open(output_shapefile.replace('.shp', '.prj'), 'w') as prj_file:
+        prj_file.write(CRS.from_epsg(epsg).to_wkt(WktVersion.WKT1_ESRI))
+
+# Read the attribute encoding of a shapefile from its .cpg
+def read_cpg(shapefile_path):
+    cpg_file = shapefile_path.replace('.shp', '.cpg')
+    if not os.path.exists(cpg_file):
+        return DEFAULT_ENCODING
+    with open(cpg_file) as cpg:
+        return cpg.read().strip() or DEFAULT_ENCODING
+
+# Write the .cpg file naming the attribute encoding of a shapefile
+def write_cpg(output_shapefile, encoding):
+    with open(output_shapefile.replace('.shp', '.cpg'), 'w') as cpg_file:
+        cpg_file.write(encoding)
+
+# Write copies of a finished shapefile in every target CRS
+def write_reprojected(output_shapefile, source_epsg, targets):
+    if not targets:
+        return []
+
+    # Copies keep the attribute encoding of the source
+    encoding = read_cpg(output_shapefile)
+    with shapefile.Reader(output_shapefile, encoding=encoding) as reader:
+        fields = reader.fields[1:]
+        shapes = reader.shapes()
+        records = reader.records()
+
+    # All coordinates of the layer as one array, reprojected in bulk per target
+    counts = [len(shape.points) for shape in shapes]
+    points = np.array([point[:2] for shape in shapes for point in shape.points], dtype=float).reshape(-1, 2)
+    offsets = np.cumsum([0] + counts)
+
+    written = []
+    for epsg in targets:
+        x, y = get_transformer(source_epsg, epsg).transform(points[:, 0], points[:, 1])
+        coords = np.column_stack([x, y]).tolist()
+
+        path = target_path(output_shapefile, epsg)
+        w = shapefile.Writer(path, shapeType=shapefile.POLYGON, encoding=encoding)
+        w.fields = list(fields)
+        for shape, record, start in zip(shapes, records, offsets):
+            if shape.shapeType == shapefile.NULL:
+                w.null()
+            else:
+                bounds = list(shape.parts) + [len(shape.points)]
+                w.poly([coords[start + a:start + b] for a, b in zip(bounds, bounds[1:])])
+            w.record(*record)
+        w.close()
+
+        write_prj(path, epsg)
+        write_cpg(path, encoding)
+        build_index(path)
+        written.append(path)
+    return written
@@ -1,15 +1,24 @@
 import time
 import geopandas as gpd
+from shapely import get_num_coordinates
 from shapely.geometry import Polygon
-import xml.etree.ElementTree as ET
 import multiprocessing as mp
 import sys
-
-# Parse the XML file correctly
+from crs import detect_source_epsg
+from outputs import finish_output
+from precision import grid_size, drop_slivers
+from nasscan import parse_members
+from profiling import start_stage
+
+# Feature types read from the XML file
+FEATURE_TYPES = [
+    'AX_Flurstueck', 'AX_KreisRegion', 'AX_Regierungsbezirk', 'AX_Gemeinde', 'AX_Bundesland',
+    'AX_Gemarkung', 'AX_LagebezeichnungMitHausnummer', 'AX_LagebezeichnungOhneHausnummer'
+]
+
+# Parse only the feature members needed for the parcels
 def parse_xml(file_path):
-    tree = ET.parse(file_path)  # Parse the entire XML file
-    root = tree.getroot()       # Get the root element
-    return root
+    return parse_members(file_path, FEATURE_TYPES)
 
 # Extract coordinates in bulk
 def extract_coordinates(posList):
@@ -147,7 +156,7 @@ def process_single_flurstueck(flurstueck, namespaces, lookup_dicts):
     }
 
 # Process all AX_Flurstueck tags with optimizations
-def process_flurstueck(root):
+def process_flurstueck(root, profiler=None):
     namespaces = {'gml': 'http://www.opengis.net/gml/3.2',
                   'adv': 'http://www.adv-online.de/namespaces/adv/gid/6.0',
                   'xlink': 'http://www.w3.org/1999/xlink'}
@@ -163,45 +172,42 @@ def process_flurstueck(root):
     }
     
     # Use multiprocessing to process Flurstueck elements in parallel
-    with mp.Pool() as pool:
-        data = pool.starmap(
-            process_single_flurstueck,
-            [(flurstueck, namespaces, lookup_dicts) for flurstueck in root.findall('.//adv:AX_Flurstueck', namespaces)]
-        )
-    
+    arguments = [(flurstueck, namespaces, lookup_dicts) for flurstueck in root.findall('.//adv:AX_Flurstueck', namespaces)]
+    if profiler is None:
+        with mp.Pool() as pool:
+            data = pool.starmap(process_single_flurstueck, arguments)
+        return data
+
+    # Profiling: parcels run serially in this process so the profiler sees process_single_flurstueck
+    data = []
+    for flurstueck, *rest in arguments:
+        token = profiler.start()
+        parcel = process_single_flurstueck(flurstueck, *rest)
+        profiler.stop(token, 'AX_Flurstueck', flurstueck.get('{http://www.opengis.net/gml/3.2}id'),
+                      int(get_num_coordinates(parcel['geometry'])))
+        data.append(parcel)
     return data
 
 # Main function
 def main(xml_file, output_shapefile):
     start_time = time.time()
+    profiler = start_stage('flurstueck')
     root = parse_xml(xml_file)
-    data = process_flurstueck(root)
+    source_epsg = detect_source_epsg(xml_file)
+    data = process_flurstueck(root, profiler)
     
     # Create a GeoDataFrame
     gdf = gpd.GeoDataFrame(data)
-    gdf.set_crs(epsg=25832, inplace=True)  # Set appropriate CRS
+    gdf.set_crs(epsg=source_epsg, inplace=True)  # CRS named in the NAS srsName
+
+    # Snap the parcels to the precision grid and drop the ones that collapse
+    gdf = drop_slivers(gdf, grid_size())
     
     # Save to a shapefile
     gdf.to_file(output_shapefile, driver='ESRI Shapefile')
     
-    # Save the .prj file with the specified projection
-    prj_content = ('PROJCS["ETRS89 / UTM zone 32N",'
-                   'GEOGCS["ETRS89",'
-                   'DATUM["European_Terrestrial_Reference_System_1989",'
-                   'SPHEROID["GRS 1980",6378137,298.257222101]],'
-                   'PRIMEM["Greenwich",0],'
-                   'UNIT["degree",0.0174532925199433]],'
-                   'PROJECTION["Transverse_Mercator"],'
-                   'PARAMETER["latitude_of_origin",0],'
-                   'PARAMETER["central_meridian",9],'
-                   'PARAMETER["scale_factor",0.9996],'
-                   'PARAMETER["false_easting",500000],'
-                   'PARAMETER["false_northing",0],'
-                   'UNIT["metre",1]]')
-    
-    prj_file = output_shapefile.replace('.shp', '.prj')
-    with open(prj_file, 'w') as prj:
-        prj.write(prj_content)
+    # Sidecars with the source projection and encoding, spatial index and target CRS copies
+    finish_output(output_shapefile, source_epsg, profiler)
     
     end_time = time.time()
     print(f"Processing complete. Shapefile saved as '{output_shapefile}'. Time taken: {end_time - start_time:.2f} seconds.")
@@ -1,6 +1,13 @@
-import xml.etree.ElementTree as ET
 import shapefile
 import sys
+from crs import detect_source_epsg
+from outputs import finish_output
+from nasscan import parse_members
+from codelists import GEBAEUDEFUNKTION, BAUWERKSFUNKTION, map_codes
+from profiling import start_stage
+
+# Opt-in profiling, None when disabled
+profiler = start_stage('guby')
 
 # Input XML file
 input_xml = sys.argv[1]
@@ -20,32 +27,13 @@ w.field('name', 'C')            # Name value
 w.field('anzahlgs', 'C')        # Anzahl der Oberirdischen Geschosse
 w.field('lagebeztxt', 'C')      # Lagebezeichnung text
 
-# Parse the XML file
-tree = ET.parse(input_xml)
-root = tree.getroot()
+# Parse only the building and address feature members of the XML file
+root = parse_members(input_xml, ['AX_Gebaeude', 'AX_SonstigesBauwerkOderSonstigeEinrichtung', 'AX_LagebezeichnungMitHausnummer'])
 
 # Namespace map
 ns = {'gml': 'http://www.opengis.net/gml/3.2',
       'adv': 'http://www.adv-online.de/namespaces/adv/gid/6.0'}
 
-# Building function mapping
-funktion_mapping = {
-    '1000': 'Wohngebäude',
-    '2000': 'Gebäude für Wirtschaft oder Gewerbe',
-    '3000': 'Gebäude für öffentliche Zwecke',
-    '3020': 'Gebäude für Bildung und Forschung',
-    '2463': 'Garage',
-    '1610': 'Überdachung',
-    '2523': 'Umformer',
-    '1620': 'Treppe',
-    '9999': 'Sonstiges',
-    '1700': 'Mauer',
-    '3041': 'Kirche',
-    '3065': 'Kinderkrippe, Kindergarten, Kindertagesstätte',
-    '3043': 'Kapelle',
-    '3072': 'Feuerwehr'
-}
-
 # Helper function to extract polygon coordinates
 def extract_polygon(coords_text):
     try:
@@ -66,16 +54,22 @@ for lage_elem in root.findall('.//adv:AX_LagebezeichnungMitHausnummer', ns):
         hausnummer = hausnummer_elem.text if hausnummer_elem is not None else ''
         lagebezeichnung_cache[gml_id] = f"{unverschluesselt} {hausnummer}".strip()
 
+# Collected features; the function codes are mapped per column afterwards
+features = []
+gebaeudefunktion_codes = []
+bauwerksfunktion_codes = []
+
 # Process AX_Gebaeude and AX_SonstigesBauwerkOderSonstigeEinrichtung
 for gebaeude in root.findall('.//adv:AX_Gebaeude', ns) + root.findall('.//adv:AX_SonstigesBauwerkOderSonstigeEinrichtung', ns):
+    if profiler:
+        token = profiler.start()
+
     # Create 'gebnutzbez' value
     gebnutzbez = 'Gebaeude' if gebaeude.tag == '{http://www.adv-online.de/namespaces/adv/gid/6.0}AX_Gebaeude' else 'Sonstiges Bauwerk Oder Sonstige Einrichtung'
 
-    # Extract and map 'funktion' value
-    funktion_elem = gebaeude.find('.//adv:gebaeudefunktion', ns)
-    if funktion_elem is None:
-        funktion_elem = gebaeude.find('.//adv:bauwerksfunktion', ns)
-    funktion = funktion_mapping.get(funktion_elem.text, 'Unbekannt') if funktion_elem is not None and funktion_elem.text else '<null>'
+    # Extract the 'funktion' code from the building or structure catalogue
+    gebaeudefunktion_elem = gebaeude.find('.//adv:gebaeudefunktion', ns)
+    bauwerksfunktion_elem = gebaeude.find('.//adv:bauwerksfunktion', ns) if gebaeudefunktion_elem is None else None
 
     # Set 'fktkurz' to '<null>'
     fktkurz = '<null>'
@@ -107,25 +101,28 @@ for gebaeude in root.findall('.//adv:AX_Gebaeude', ns) + root.findall('.//adv:AX
                 polygon_coords.extend(coords)
 
     if polygon_coords:
-        # Add polygon and record to shapefile
-        w.poly([polygon_coords])
-        w.record(gebnutzbez, funktion, fktkurz, name, anzahlgs, lagebeztxt)
+        features.append((polygon_coords, gebnutzbez, fktkurz, name, anzahlgs, lagebeztxt))
+        gebaeudefunktion_codes.append(gebaeudefunktion_elem.text if gebaeudefunktion_elem is not None else None)
+        bauwerksfunktion_codes.append(bauwerksfunktion_elem.text if bauwerksfunktion_elem is not None else None)
+
+    if profiler:
+        profiler.stop(token, gebaeude.tag.split('}')[-1], gebaeude.get('{http://www.opengis.net/gml/3.2}id'), len(polygon_coords))
+
+# Map the function codes of all features at once
+gebaeudefunktion = map_codes(gebaeudefunktion_codes, GEBAEUDEFUNKTION)
+bauwerksfunktion = map_codes(bauwerksfunktion_codes, BAUWERKSFUNKTION)
+
+for (polygon_coords, gebnutzbez, fktkurz, name, anzahlgs, lagebeztxt), gebaeude_code, gebaeude_label, bauwerk_label in zip(
+        features, gebaeudefunktion_codes, gebaeudefunktion, bauwerksfunktion):
+    funktion = gebaeude_label if gebaeude_code is not None else bauwerk_label
+
+    # Add polygon and record to shapefile
+    w.poly([polygon_coords])
+    w.record(gebnutzbez, funktion, fktkurz, name, anzahlgs, lagebeztxt)
 
 # Save shapefile
 w.close()
 
-# Define spatial reference (projection file)
-with open(output_shapefile.replace('.shp', '.prj'), 'w') as prj_file:
-    prj_file.write('PROJCS["ETRS89 / UTM zone 32N",'
-                   'GEOGCS["ETRS89",'
-                   'DATUM["European_Terrestrial_Reference_System_1989",'
-                   'SPHEROID["GRS 1980",6378137,298.257222101]],'
-                   'PRIMEM["Greenwich",0],'
-                   'UNIT["degree",0.0174532925199433]],'
-                   'PROJECTION["Transverse_Mercator"],'
-                   'PARAMETER["latitude_of_origin",0],'
-                   'PARAMETER["central_meridian",9],'
-                   'PARAMETER["scale_factor",0.9996],'
-                   'PARAMETER["false_easting",500000],'
-                   'PARAMETER["false_northing",0],'
-                   'UNIT["metre",1]]')
\ No newline at end of file
+# Define spatial reference (projection file) from the NAS srsName, spatial index and target CRS copies
+source_epsg = detect_source_epsg(input_xml)
+finish_output(output_shapefile, source_epsg, profiler)
\ No newline at end of file
@@ -0,0 +1,317 @@
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from nasscan import PREFILTER_ENV
+from precision import GRID_SIZE_ENV
+from crs import TARGET_CRS_ENV
+from profiling import PROFILE_ENV
+
+# Engines as environment overrides; 'reference' is today's full-parse, full-precision path
+ENGINES = {
+    'reference': {PREFILTER_ENV: '0', GRID_SIZE_ENV: '0'},
+    'prefilter': {PREFILTER_ENV: '1', GRID_SIZE_ENV: '0'},
+    'snapped': {PREFILTER_ENV: '1', GRID_SIZE_ENV: '0.001'}
+}
+
+# Output layers compared between engines
+LAYERS = ['flurstueck', 'nutzung', 'nutzungFlurstueck', 'gebauedeBauwerk', 'verwaltungsEinheit', 'katasterBezirk']
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Land-use types and building function codes used in the synthetic NAS files
+SYNTHETIC_NUTZUNG = [('AX_Wald', 'vegetationsmerkmal', '1100'), ('AX_Landwirtschaft', 'vegetationsmerkmal', '1010'),
+                     ('AX_Wohnbauflaeche', None, None), ('AX_IndustrieUndGewerbeflaeche', 'funktion', '1700'),
+                     ('AX_Strassenverkehr', 'funktion', '2312')]
+SYNTHETIC_GEBAEUDEFUNKTION = ['1000', '1010', '2463', '3041', '2020', '9998']
+
+# GML polygon of an axis-aligned square
+def synthetic_polygon(x, y, size):
+    coords = f"{x} {y} {x + size} {y} {x + size} {y + size} {x} {y + size} {x} {y}"
+    return ('<position><gml:Polygon srsName="urn:adv:crs:ETRS89_UTM32"><gml:exterior><gml:LinearRing>'
+            f'<gml:posList>{coords}</gml:posList></gml:LinearRing></gml:exterior></gml:Polygon></position>')
+
+# Write a synthetic NAS file with size x size parcels, land-use areas and buildings
+def write_synthetic_nas(xml_file, size, seed=0):
+    rng = random.Random(seed)
+    members = [
+        '<AX_Bundesland gml:id="DEBL0001"><schluesselGesamt>05</schluesselGesamt><bezeichnung>Nordrhein-Westfalen</bezeichnung></AX_Bundesland>',
+        '<AX_Regierungsbezirk gml:id="DERB0001"><schluesselGesamt>051</schluesselGesamt><bezeichnung>Düsseldorf</bezeichnung></AX_Regierungsbezirk>',
+        '<AX_KreisRegion gml:id="DEKR0001"><schluesselGesamt>05111</schluesselGesamt><bezeichnung>Düsseldorf</bezeichnung></AX_KreisRegion>',
+        '<AX_Gemeinde gml:id="DEGE0001"><schluesselGesamt>05111000</schluesselGesamt><bezeichnung>Düsseldorf</bezeichnung></AX_Gemeinde>',
+        '<AX_Gemarkung gml:id="DEGM0001"><schluesselGesamt>051234</schluesselGesamt><bezeichnung>Synthetisch</bezeichnung></AX_Gemarkung>',
+        '<AX_LagebezeichnungMitHausnummer gml:id="DELB0001"><lagebezeichnung><AX_Lagebezeichnung>'
+        '<unverschluesselt>Hauptstraße</unverschluesselt></AX_Lagebezeichnung></lagebezeichnung>'
+        '<hausnummer>1</hausnummer></AX_LagebezeichnungMitHausnummer>'
+    ]
+
+    number = 0
+    for i in range(size):
+        for j in range(size):
+            number += 1
+            x, y = 350000 + i * 20, 5600000 + j * 20
+            members.append(
+                f'<AX_Flurstueck gml:id="DEFS{number:08d}"><gemarkung><AX_Gemarkung_Schluessel><land>05</land>'
+                f'<gemarkungsnummer>1234</gemarkungsnummer></AX_Gemarkung_Schluessel></gemarkung>'
+                f'<flurstueckskennzeichen>051234001{number:05d}______</flurstueckskennzeichen>'
+                f'<amtlicheFlaeche>400</amtlicheFlaeche><flurstuecksnummer><AX_Flurstuecksnummer>'
+                f'<zaehler>{number}</zaehler></AX_Flurstuecksnummer></flurstuecksnummer>'
+                f'<gemeindezugehoerigkeit><AX_Gemeindekennzeichen><land>05</land><regierungsbezirk>1</regierungsbezirk>'
+                f'<kreis>11</kreis><gemeinde>000</gemeinde></AX_Gemeindekennzeichen></gemeindezugehoerigkeit>'
+                f'{synthetic_polygon(x, y, 20)}<weistAuf xlink:href="urn:adv:oid:DELB0001"/></AX_Flurstueck>')
+
+            # Land-use areas are shifted against the parcels so the overlay has work to do
+            tag, code_element, code = rng.choice(SYNTHETIC_NUTZUNG)
+            code_xml = f'<{code_element}>{code}</{code_element}>' if code_element else ''
+            members.append(f'<{tag} gml:id="DENU{number:08d}">{synthetic_polygon(x - 5.123, y + 0.0004, 20)}{code_xml}</{tag}>')
+
+            if rng.random() < 0.4:
+                members.append(
+                    f'<AX_Gebaeude gml:id="DEGB{number:08d}">{synthetic_polygon(x + 2, y + 2, rng.uniform(4, 12))}'
+                    f'<gebaeudefunktion>{rng.choice(SYNTHETIC_GEBAEUDEFUNKTION)}</gebaeudefunktion>'
+                    f'<anzahlDerOberirdischenGeschosse>{rng.randint(1, 5)}</anzahlDerOberirdischenGeschosse>'
+                    f'<zeigtAuf xlink:href="urn:adv:oid:DELB0001"/></AX_Gebaeude>')
+            if rng.random() < 0.1:
+                members.append(
+                    f'<AX_SonstigesBauwerkOderSonstigeEinrichtung gml:id="DESB{number:08d}">{synthetic_polygon(x + 15, y + 15, 3)}'
+                    f'<bauwerksfunktion>1611</bauwerksfunktion></AX_SonstigesBauwerkOderSonstigeEinrichtung>')
+
+    with open(xml_file, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<AX_Bestandsdatenauszug xmlns="http://www.adv-online.de/namespaces/adv/gid/6.0" '
+                'xmlns:gml="http://www.opengis.net/gml/3.2" xmlns:xlink="http://www.w3.org/1999/xlink" '
+                'xmlns:wfs="http://www.opengis.net/wfs/2.0"><enthaelt><wfs:FeatureCollection>\n')
+        for member in members:
+            f.write(f'<gml:featureMember>{member}</gml:featureMember>\n')
+        f.write('</wfs:FeatureCollection></enthaelt></AX_Bestandsdatenauszug>')
+
+# Run the conversion stages of main.py with an engine's environment, returning the elapsed time per stage;
+# with stats the 'nutflu.py ... stats' table is written too, under the 'stats' key
+def run_pipeline(xml_file, output_path, engine_env, stats=False):
+    os.makedirs(output_path, exist_ok=True)
+    # Target CRS copies and profiling would distort the timings
+    env = dict(os.environ, **engine_env, **{TARGET_CRS_ENV: '', PROFILE_ENV: ''})
+    shp = {layer: os.path.join(output_path, f"{layer}.shp") for layer in LAYERS}
+    stages = [
+        ('flurstueck', ['flurstueck.py', xml_file, shp['flurstueck']]),
+        ('nutzung', ['nutzung.py', xml_file, os.path.join(SCRIPT_DIR, 'bez_dict.json'), shp['nutzung']]),
+        ('nutzungFlurstueck', ['nutflu.py', shp['flurstueck'], shp['nutzung'], shp['nutzungFlurstueck']]),
+        ('gebauedeBauwerk', ['guby.py', xml_file, shp['gebauedeBauwerk']]),
+        ('verwaltungsEinheit', ['ver.py', shp['flurstueck'], xml_file, shp['verwaltungsEinheit']]),
+        ('katasterBezirk', ['kat.py', shp['flurstueck'], shp['katasterBezirk']])
+    ]
+    if stats:
+        stages.append(('stats', ['nutflu.py', shp['flurstueck'], shp['nutzung'], stats_path(output_path), 'stats']))
+
+    seconds = {}
+    for stage, (script_name, *args) in stages:
+        command = [sys.executable, os.path.join(SCRIPT_DIR, script_name)] + args
+        start_time = time.time()
+        result = subprocess.run(command, capture_output=True, text=True, env=env, cwd=SCRIPT_DIR)
+        seconds[stage] = time.time() - start_time
+        if result.returncode != 0:
+            raise RuntimeError(f"Error running {script_name}: {result.stderr}")
+    return seconds
+
+# Path of the parcel / land-use area table of a run
+def stats_path(output_path):
+    return os.path.join(output_path, 'nutzungFlurstueck.csv')
+
+# Sort a layer by its attributes and centroid so features of two runs line up
+def sorted_layer(gdf):
+    attributes = [column for column in gdf.columns if column != 'geometry']
+    gdf = gdf.copy()
+    gdf[attributes] = gdf[attributes].fillna('').astype(str)
+    centroids = gdf.geometry.centroid
+    gdf['_x'] = centroids.x.round(1)
+    gdf['_y'] = centroids.y.round(1)
+    return gdf.sort_values(attributes + ['_x', '_y']).drop(columns=['_x', '_y']).reset_index(drop=True)
+
+# Features thinner than the Hausdorff tolerance everywhere, the slivers a tolerant engine may drop
+def sliver_features(layer, hausdorff_tolerance):
+    return shapely.is_empty(shapely.buffer(layer.geometry.to_numpy(), -hausdorff_tolerance / 2))
+
+# Compare layers whose features cannot be paired up (e.g. slivers dropped by snapping): leaving out
+# the sliver features, every attribute group must exist on both sides with its total area matching
+# relative to its own area, and the dissolved layers must lie within the Hausdorff distance
+def compare_groups(reference, candidate, attributes, hausdorff_tolerance):
+    reference_slivers = sliver_features(reference, hausdorff_tolerance)
+    candidate_slivers = sliver_features(candidate, hausdorff_tolerance)
+    reference_kept = reference[~reference_slivers]
+    candidate_kept = candidate[~candidate_slivers]
+
+    reference_areas = reference_kept.geometry.area.groupby([reference_kept[column] for column in attributes]).sum()
+    candidate_areas = candidate_kept.geometry.area.groupby([candidate_kept[column] for column in attributes]).sum()
+    reference_areas, candidate_areas = reference_areas.align(candidate_areas, fill_value=0.0)
+    one_sided = (reference_areas == 0) != (candidate_areas == 0)
+    shared = ~one_sided & (reference_areas > 0)
+    area_difference = (reference_areas - candidate_areas).abs()[shared] / reference_areas[shared]
+
+    reference_dissolved = shapely.union_all(reference.geometry.to_numpy())
+    candidate_dissolved = shapely.union_all(candidate.geometry.to_numpy())
+    return {
+        'group_mismatches': int(one_sided.sum()),
+        'reference_slivers': int(reference_slivers.sum()),
+        'candidate_slivers': int(candidate_slivers.sum()),
+        'max_hausdorff': float(shapely.hausdorff_distance(reference_dissolved, candidate_dissolved)) if len(reference) else 0.0,
+        'max_area_difference': float(area_difference.max()) if len(area_difference) else 0.0
+    }
+
+# Compare one layer of a candidate run against the reference run
+def compare_layer(reference_shapefile, candidate_shapefile, hausdorff_tolerance, area_tolerance):
+    reference = sorted_layer(gpd.read_file(reference_shapefile))
+    candidate = sorted_layer(gpd.read_file(candidate_shapefile))
+    result = {'reference_count': len(reference), 'candidate_count': len(candidate)}
+
+    attributes = [column for column in reference.columns if column != 'geometry']
+    same_columns = attributes == [column for column in candidate.columns if column != 'geometry']
+
+    # Features can only be paired up when both layers have the same count, otherwise compare per attribute group
+    if len(reference) != len(candidate):
+        if not same_columns:
+            result.update(comparison='groups', attribute_mismatches=None, max_hausdorff=None, max_area_difference=None, equivalent=False)
+            return result
+        result.update(comparison='groups', attribute_mismatches=None,
+                      **compare_groups(reference, candidate, attributes, hausdorff_tolerance))
+        result['equivalent'] = (result['group_mismatches'] == 0 and
+                                result['max_hausdorff'] <= hausdorff_tolerance and
+                                result['max_area_difference'] <= area_tolerance)
+        return result
+
+    result['comparison'] = 'features'
+    attribute_mismatches = int((reference[attributes] != candidate[attributes]).any(axis=1).sum()) if same_columns else len(reference)
+
+    reference_geoms = reference.geometry.to_numpy()
+    candidate_geoms = candidate.geometry.to_numpy()
+    hausdorff = shapely.hausdorff_distance(reference_geoms, candidate_geoms)
+    reference_area = shapely.area(reference_geoms)
+    area_difference = np.abs(reference_area - shapely.area(candidate_geoms)) / np.maximum(reference_area, 1e-9)
+
+    result.update(
+        attribute_mismatches=attribute_mismatches,
+        max_hausdorff=float(np.nanmax(hausdorff)) if len(reference) else 0.0,
+        max_area_difference=float(np.nanmax(area_difference)) if len(reference) else 0.0
+    )
+    result['equivalent'] = (attribute_mismatches == 0 and
+                            result['max_hausdorff'] <= hausdorff_tolerance and
+                            result['max_area_difference'] <= area_tolerance)
+    return result
+
+# Compare the area table of 'nutflu.py ... stats' with the (flstkennz, nutzart) area sums of an overlay layer
+def compare_stats(overlay_shapefile, stats_table, area_tolerance):
+    overlay = gpd.read_file(overlay_shapefile)
+    overlay = overlay[overlay['flstkennz'].notna() & overlay['nutzart'].notna()]
+    overlay_areas = overlay.geometry.area.groupby([overlay['flstkennz'], overlay['nutzart']]).sum()
+    table = pd.read_csv(stats_table, dtype={'flstkennz': str, 'nutzart': str})
+    table_areas = table.groupby(['flstkennz', 'nutzart'])['area'].sum()
+
+    overlay_areas, table_areas = overlay_areas[overlay_areas > 0].align(table_areas, fill_value=0.0)
+    one_sided = (overlay_areas == 0) != (table_areas == 0)
+    shared = ~one_sided & (overlay_areas > 0)
+    area_difference = (overlay_areas - table_areas).abs()[shared] / overlay_areas[shared]
+
+    result = {
+        'reference_count': int((overlay_areas > 0).sum()),
+        'candidate_count': len(table),
+        'comparison': 'groups',
+        'group_mismatches': int(one_sided.sum()),
+        'max_area_difference': float(area_difference.max()) if len(area_difference) else 0.0
+    }
+    result['equivalent'] = result['group_mismatches'] == 0 and result['max_area_difference'] <= area_tolerance
+    return result
+
+# Run every engine on every input and compare the layers against the reference
+def run_harness(xml_files, engines, workdir, hausdorff_tolerance, area_tolerance):
+    report = []
+    for xml_file in xml_files:
+        xml_file = os.path.abspath(xml_file)
+        name = os.path.splitext(os.path.basename(xml_file))[0]
+        reference_path = os.path.join(workdir, name, 'reference')
+        reference_seconds = run_pipeline(xml_file, reference_path, ENGINES['reference'], stats=True)
+        reference_time = sum(seconds for stage, seconds in reference_seconds.items() if stage != 'stats')
+        print(f"{name}: reference {reference_time:.2f} seconds")
+
+        # The area table of 'nutflu.py ... stats' is the alternative engine of the overlay stage
+        stats_result = compare_stats(os.path.join(reference_path, 'nutzungFlurstueck.shp'),
+                                     stats_path(reference_path), area_tolerance)
+        entry = {
+            'input': xml_file,
+            'engine': 'stats',
+            'reference_seconds': reference_seconds['nutzungFlurstueck'],
+            'engine_seconds': reference_seconds['stats'],
+            'speedup': reference_seconds['nutzungFlurstueck'] / reference_seconds['stats'] if reference_seconds['stats'] else None,
+            'equivalent': stats_result['equivalent'],
+            'layers': {'nutzungFlurstueck': stats_result}
+        }
+        report.append(entry)
+        status = 'equivalent' if entry['equivalent'] else 'DIFFERS'
+        print(f"{name}: stats {entry['engine_seconds']:.2f} seconds, speedup {entry['speedup']:.2f}x over the overlay, {status}")
+        if not entry['equivalent']:
+            print(f"    nutzungFlurstueck: {stats_result}")
+
+        for engine in engines:
+            engine_path = os.path.join(workdir, name, engine)
+            engine_time = sum(run_pipeline(xml_file, engine_path, ENGINES[engine]).values())
+            layers = {layer: compare_layer(os.path.join(reference_path, f"{layer}.shp"),
+                                           os.path.join(engine_path, f"{layer}.shp"),
+                                           hausdorff_tolerance, area_tolerance)
+                      for layer in LAYERS}
+            entry = {
+                'input': xml_file,
+                'engine': engine,
+                'reference_seconds': reference_time,
+                'engine_seconds': engine_time,
+                'speedup': reference_time / engine_time if engine_time else None,
+                'equivalent': all(result['equivalent'] for result in layers.values()),
+                'layers': layers
+            }
+            report.append(entry)
+
+            status = 'equivalent' if entry['equivalent'] else 'DIFFERS'
+            print(f"{name}: {engine} {engine_time:.2f} seconds, speedup {entry['speedup']:.2f}x, {status}")
+            for layer, result in layers.items():
+                if not result['equivalent']:
+                    print(f"    {layer}: {result}")
+    return report
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare alternative engines against the reference conversion")
+    parser.add_argument('xml_files', nargs='*', help="NAS input files")
+    parser.add_argument('--synthetic', type=int, nargs='*', default=[],
+                        help="Also generate synthetic NAS inputs with N x N parcels for each given N")
+    parser.add_argument('--engines', default='prefilter,snapped',
+                        help=f"Comma separated engines to compare ({', '.join(name for name in ENGINES if name != 'reference')})")
+    parser.add_argument('--workdir', default='harness_output', help="Directory for the outputs of every run")
+    parser.add_argument('--report', default='harness_report.json', help="JSON report file")
+    parser.add_argument('--hausdorff', type=float, default=0.01, help="Maximum Hausdorff distance in metres")
+    parser.add_argument('--area-tolerance', type=float, default=1e-4, help="Maximum relative area difference")
+    args = parser.parse_args()
+
+    engines = [engine.strip() for engine in args.engines.split(',') if engine.strip()]
+    unknown = [engine for engine in engines if engine not in ENGINES]
+    if unknown:
+        parser.error(f"unknown engines: {', '.join(unknown)}")
+
+    xml_files = list(args.xml_files)
+    os.makedirs(args.workdir, exist_ok=True)
+    for size in args.synthetic:
+        synthetic_file = os.path.join(args.workdir, f"synthetic_{size}.xml")
+        write_synthetic_nas(synthetic_file, size)
+        xml_files.append(synthetic_file)
+    if not xml_files:
+        parser.error("no inputs, pass NAS files or --synthetic N")
+
+    report = run_harness(xml_files, engines, args.workdir, args.hausdorff, args.area_tolerance)
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"Report saved as '{args.report}'.")
+    sys.exit(0 if all(entry['equivalent'] for entry in report) else 1)
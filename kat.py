@@ -1,8 +1,15 @@
 import geopandas as gpd
-from shapely.ops import unary_union
+from shapely import union_all
 import shapefile
 from shapely.geometry import Polygon, MultiPolygon
 import sys
+from crs import epsg_from_prj
+from outputs import finish_output
+from precision import grid_size, drop_slivers
+from profiling import start_stage
+
+# Opt-in profiling, None when disabled
+profiler = start_stage('kat')
 
 # Input shapefile
 input_shapefile = sys.argv[1]
@@ -13,14 +20,16 @@ output_shapefile = sys.argv[2]
 # Step 1: Load the shapefile
 gdf = gpd.read_file(input_shapefile)
 
-# Step 2: Fix invalid geometries
+# Step 2: Fix invalid geometries and snap them to the precision grid
+precision = grid_size()
 gdf['geometry'] = gdf['geometry'].buffer(0)
+gdf = drop_slivers(gdf, precision)
 
 # Step 3: Group by gemarkung and create exterior boundaries
 gemarkung_boundaries = {}
 gemarkung_data = {}
 for gemarkung, group in gdf.groupby('gemarkung'):
-    merged_polygon = unary_union(group.geometry)
+    merged_polygon = union_all(group.geometry, grid_size=precision)
     if isinstance(merged_polygon, Polygon):
         exterior_boundary = Polygon(merged_polygon.exterior)
     elif isinstance(merged_polygon, MultiPolygon):
@@ -70,23 +79,11 @@ for gemarkung, boundary in gemarkung_boundaries.items():
             w.poly([list(poly.exterior.coords)])
             w.record(f"DE{data['schluessel']}000", 'Gemarkungsteil / Flur', 'Flur', f"{data['schluessel']}00", data['gemeinde'])
 
-# Define spatial reference (projection file)
-with open(output_shapefile.replace('.shp', '.prj'), 'w') as prj_file:
-    prj_file.write('PROJCS["ETRS89 / UTM zone 32N",'
-                   'GEOGCS["ETRS89",'
-                   'DATUM["European_Terrestrial_Reference_System_1989",'
-                   'SPHEROID["GRS 1980",6378137,298.257222101]],'
-                   'PRIMEM["Greenwich",0],'
-                   'UNIT["degree",0.0174532925199433]],'
-                   'PROJECTION["Transverse_Mercator"],'
-                   'PARAMETER["latitude_of_origin",0],'
-                   'PARAMETER["central_meridian",9],'
-                   'PARAMETER["scale_factor",0.9996],'
-                   'PARAMETER["false_easting",500000],'
-                   'PARAMETER["false_northing",0],'
-                   'UNIT["metre",1]]')
-
 # Save the shapefile
 w.close()
 
+# Define spatial reference (projection file) from the input shapefile, spatial index and target CRS copies
+source_epsg = epsg_from_prj(input_shapefile)
+finish_output(output_shapefile, source_epsg, profiler)
+
 print(f"Shapefile '{output_shapefile}' created successfully with exterior boundaries and additional fields.")
\ No newline at end of file
@@ -1,5 +1,25 @@
+import argparse
+import os
 import subprocess
 import time
+from precision import GRID_SIZE_ENV, sliver_reports
+from crs import TARGET_CRS_ENV, parse_target_crs
+from profiling import PROFILE_ENV, PROFILE_MEMORY_ENV
+
+# Output layers in pipeline order and the layers each one is built from
+LAYERS = ['flurstueck', 'nutzung', 'nutzungFlurstueck', 'gebauedeBauwerk', 'verwaltungsEinheit', 'katasterBezirk']
+LAYER_DEPENDENCIES = {
+    'nutzungFlurstueck': ['flurstueck', 'nutzung'],
+    'verwaltungsEinheit': ['flurstueck'],
+    'katasterBezirk': ['flurstueck']
+}
+
+# Add the layers the requested ones depend on
+def resolve_layers(requested):
+    layers = set(requested)
+    for layer in requested:
+        layers.update(LAYER_DEPENDENCIES.get(layer, []))
+    return layers
 
 def run_script(script_name, *args):
     command = ['python', script_name] + list(args)
@@ -11,30 +31,84 @@ def run_script(script_name, *args):
         print(f"Error running {script_name}: {result.stderr}")
     else:
         print(f"Successfully ran {script_name} in {elapsed_time:.2f} seconds")
+        for line in sliver_reports(result.stdout):
+            print(f"  {line}")
     return elapsed_time
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NAS-ALKIS conversion")
+    parser.add_argument('--layers', default=','.join(LAYERS),
+                        help=f"Comma separated layers to build, dependencies are added automatically ({', '.join(LAYERS)})")
+    parser.add_argument('--nutflu-mode', choices=['overlay', 'stats'], default='overlay',
+                        help="'overlay' writes the union geometry layer, 'stats' only the parcel / land-use area table")
+    parser.add_argument('--grid-size', type=float, default=0,
+                        help="Snap coordinates to this grid in metres (e.g. 0.001), 0 keeps full precision")
+    parser.add_argument('--target-crs', default='',
+                        help="Comma separated EPSG codes to also write every output in, e.g. 4326,EPSG:25833")
+    parser.add_argument('--profile', metavar='DIR', default='',
+                        help="Write cProfile dumps and per-feature-type cost reports of every stage to DIR")
+    parser.add_argument('--profile-memory', action='store_true',
+                        help="Trace allocations per feature type instead of timing, as a separate pass (needs --profile)")
+    parser.add_argument('--tiles', action='store_true',
+                        help="Export flurstueck, nutzung and gebauedeBauwerk as an MBTiles vector tile pyramid")
+    args = parser.parse_args()
+
+    requested = [layer.strip() for layer in args.layers.split(',') if layer.strip()]
+    unknown = [layer for layer in requested if layer not in LAYERS]
+    if unknown:
+        parser.error(f"unknown layers: {', '.join(unknown)}")
+    layers = resolve_layers(requested)
+
+    if args.profile_memory and not args.profile:
+        parser.error("--profile-memory needs --profile DIR")
+
+    try:
+        target_crs = parse_target_crs(args.target_crs)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # Scripts read the precision grid, target CRSs and profiling directory from the environment
+    os.environ[GRID_SIZE_ENV] = str(args.grid_size)
+    os.environ[TARGET_CRS_ENV] = ','.join(str(epsg) for epsg in target_crs)
+    os.environ[PROFILE_ENV] = os.path.abspath(args.profile) if args.profile else ''
+    os.environ[PROFILE_MEMORY_ENV] = '1' if args.profile_memory else '0'
+
     # Define file paths
     xml_file = "1546621_0.xml"
     bez_dict_file = "bez_dict.json"
     flurstueck_shapefile = "flurstueck.shp"
     nutzung_shapefile = "nutzung.shp"
     nutzung_flurstueck_shapefile = "nutzungFlurstueck.shp"
+    nutzung_flurstueck_table = "nutzungFlurstueck.csv"
     gebauede_bauwerk_shapefile = "gebauedeBauwerk.shp"
     verwaltungs_einheit_shapefile = "verwaltungsEinheit.shp"
     kataster_bezirk_shapefile = "katasterBezirk.shp"
+    vector_tiles = "alkis.mbtiles"
 
     # Track total execution time
     total_start_time = time.time()
 
-    # Run scripts in the correct order
+    # Run scripts in the correct order, skipping the stages of unused layers
     total_time = 0
-    total_time += run_script('flurstueck.py', xml_file, flurstueck_shapefile)
-    total_time += run_script('nutzung.py', xml_file, bez_dict_file, nutzung_shapefile)
-    total_time += run_script('nutflu.py', flurstueck_shapefile, nutzung_shapefile, nutzung_flurstueck_shapefile)
-    total_time += run_script('guby.py', xml_file, gebauede_bauwerk_shapefile)
-    total_time += run_script('ver.py', flurstueck_shapefile, xml_file, verwaltungs_einheit_shapefile)
-    total_time += run_script('kat.py', flurstueck_shapefile, kataster_bezirk_shapefile)
+    if 'flurstueck' in layers:
+        total_time += run_script('flurstueck.py', xml_file, flurstueck_shapefile)
+    if 'nutzung' in layers:
+        total_time += run_script('nutzung.py', xml_file, bez_dict_file, nutzung_shapefile)
+    if 'nutzungFlurstueck' in layers:
+        if args.nutflu_mode == 'stats':
+            total_time += run_script('nutflu.py', flurstueck_shapefile, nutzung_shapefile, nutzung_flurstueck_table, 'stats')
+        else:
+            total_time += run_script('nutflu.py', flurstueck_shapefile, nutzung_shapefile, nutzung_flurstueck_shapefile)
+    if 'gebauedeBauwerk' in layers:
+        total_time += run_script('guby.py', xml_file, gebauede_bauwerk_shapefile)
+    if 'verwaltungsEinheit' in layers:
+        total_time += run_script('ver.py', flurstueck_shapefile, xml_file, verwaltungs_einheit_shapefile)
+    if 'katasterBezirk' in layers:
+        total_time += run_script('kat.py', flurstueck_shapefile, kataster_bezirk_shapefile)
+    tile_layers = [shapefile for layer, shapefile in [('flurstueck', flurstueck_shapefile), ('nutzung', nutzung_shapefile),
+                                                      ('gebauedeBauwerk', gebauede_bauwerk_shapefile)] if layer in layers]
+    if args.tiles and tile_layers:
+        total_time += run_script('tiles.py', vector_tiles, *tile_layers)
 
     total_end_time = time.time()
     total_elapsed_time = total_end_time - total_start_time
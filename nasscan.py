@@ -0,0 +1,77 @@
+import mmap
+import os
+import re
+import xml.etree.ElementTree as ET
+from collections import defaultdict
+
+# Set to 0 to parse the whole document instead of the prefiltered members
+PREFILTER_ENV = 'NAS_PREFILTER'
+
+# Byte patterns of the document prolog, feature members and namespace declarations
+XML_DECLARATION = re.compile(rb'<\?xml[^>]*\?>')
+MEMBER_START = re.compile(rb'<((?:[\w.-]+:)?(?:featureMember|member))[\s/>]')
+FEATURE_NAME = re.compile(rb'<(?:[\w.-]+:)?([\w.-]+)')
+NAMESPACE_DECLARATION = re.compile(rb"""(xmlns(?::[\w.-]+)?)\s*=\s*(?:"[^"]*"|'[^']*')""")
+
+# Record the byte span of every top-level feature member, grouped by feature type
+def scan(xml_file):
+    offsets = defaultdict(list)
+    header = b''
+    if os.path.getsize(xml_file) == 0:
+        return header, offsets
+
+    with open(xml_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = 0
+        while True:
+            match = MEMBER_START.search(mm, pos)
+            if match is None:
+                break
+            if not offsets and not header:
+                header = mm[:match.start()]
+
+            # Members that only reference a feature by xlink:href have no content
+            tag_end = mm.find(b'>', match.start())
+            if mm[tag_end - 1:tag_end] == b'/':
+                pos = tag_end + 1
+                continue
+
+            end_tag = b'</' + match.group(1) + b'>'
+            end = mm.find(end_tag, tag_end)
+            if end < 0:
+                break
+            end += len(end_tag)
+
+            name = FEATURE_NAME.search(mm, tag_end + 1, end)
+            if name is not None:
+                offsets[name.group(1).decode('utf-8')].append((match.start(), end))
+            pos = end
+
+    return header, offsets
+
+# Wrapper element start tag carrying the encoding and namespaces declared before the first member
+def wrapper_start(header):
+    declaration = XML_DECLARATION.search(header)
+    namespaces = {}
+    for match in NAMESPACE_DECLARATION.finditer(header):
+        namespaces.setdefault(match.group(1), match.group(0))
+    return (declaration.group(0) if declaration else b'') + b'<nasscan ' + b' '.join(namespaces.values()) + b'>'
+
+# Parse only the feature members of the given types into one root element
+def parse_members(xml_file, types):
+    if os.environ.get(PREFILTER_ENV, '1') == '0':
+        return ET.parse(xml_file).getroot()
+
+    header, offsets = scan(xml_file)
+    if not offsets:
+        # No wrapped feature members found, fall back to a full parse
+        return ET.parse(xml_file).getroot()
+
+    # Keep the members in document order
+    spans = sorted(span for feature_type in types for span in offsets.get(feature_type, []))
+    with open(xml_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        body = b''.join(mm[start:end] for start, end in spans)
+    try:
+        return ET.fromstring(wrapper_start(header) + body + b'</nasscan>')
+    except ET.ParseError:
+        # Members the scanner could not wrap (e.g. prefixes declared in an unexpected place)
+        return ET.parse(xml_file).getroot()
@@ -1,29 +1,89 @@
 import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from shapely import STRtree
 import sys
+from crs import epsg_from_prj
+from outputs import finish_output
+from precision import grid_size, snap, drop_slivers
+from profiling import start_stage
 
-def clean_geometries(gdf):
+# Number of candidate pairs intersected per vectorized batch
+BATCH_SIZE = 100000
+
+def clean_geometries(gdf, precision=None):
     # Check and fix invalid geometries
     gdf['geometry'] = gdf['geometry'].buffer(0)  # This can help fix some topology issues
-    gdf = gdf[gdf.is_valid]  # Remove invalid geometries
+    gdf['geometry'] = snap(gdf['geometry'], precision)  # Snap to the precision grid
+    gdf = gdf[gdf.is_valid & ~gdf.is_empty]  # Remove invalid and collapsed geometries
     return gdf
 
 def union_shapefiles(shapefile1, shapefile2, output_shapefile):
     gdf1 = gpd.read_file(shapefile1)
     gdf2 = gpd.read_file(shapefile2)
+    precision = grid_size()
 
     # Clean geometries
-    gdf1 = clean_geometries(gdf1)
-    gdf2 = clean_geometries(gdf2)
+    gdf1 = clean_geometries(gdf1, precision)
+    gdf2 = clean_geometries(gdf2, precision)
 
     # Perform the union
     union_gdf = gpd.overlay(gdf1, gdf2, how='union')
 
+    # Drop the sliver pieces that collapse on the precision grid
+    union_gdf = drop_slivers(union_gdf, precision)
+
     # Save the result to a new shapefile
     union_gdf.to_file(output_shapefile)
 
+    # Sidecars with the parcel layer's projection, spatial index and target CRS copies
+    finish_output(output_shapefile, epsg_from_prj(shapefile1))
+
+def area_statistics(shapefile1, shapefile2, output_table):
+    precision = grid_size()
+    flurstueck = clean_geometries(gpd.read_file(shapefile1), precision)
+    nutzung = clean_geometries(gpd.read_file(shapefile2), precision)
+    flurstueck_geoms = flurstueck.geometry.to_numpy()
+    nutzung_geoms = nutzung.geometry.to_numpy()
+
+    # Candidate parcel / land-use pairs from the STRtree
+    tree = STRtree(nutzung_geoms)
+    flurstueck_idx, nutzung_idx = tree.query(flurstueck_geoms, predicate='intersects')
+
+    # Intersection areas of the candidate pairs, in vectorized batches
+    areas = np.empty(len(flurstueck_idx))
+    for start in range(0, len(flurstueck_idx), BATCH_SIZE):
+        batch = slice(start, start + BATCH_SIZE)
+        areas[batch] = shapely.area(shapely.intersection(flurstueck_geoms[flurstueck_idx[batch]],
+                                                         nutzung_geoms[nutzung_idx[batch]],
+                                                         grid_size=precision))
+
+    # Sum the areas per flstkennz and nutzart; pairs that only touch are dropped
+    table = pd.DataFrame({
+        'flstkennz': flurstueck['flstkennz'].to_numpy()[flurstueck_idx],
+        'nutzart': nutzung['nutzart'].to_numpy()[nutzung_idx],
+        'area': areas
+    })
+    table = table[table['area'] > 0].groupby(['flstkennz', 'nutzart'], as_index=False)['area'].sum()
+
+    # Share of each land use in the parcel area
+    parcel_area = flurstueck.area.groupby(flurstueck['flstkennz']).sum()
+    table['share'] = table['area'] / table['flstkennz'].map(parcel_area)
+
+    # Save the result as a table
+    table.to_csv(output_table, index=False)
+
 # Example usage
 if __name__ == "__main__":
     shapefile1 = sys.argv[1]
     shapefile2 = sys.argv[2]
-    output_shapefile = sys.argv[3]
-    union_shapefiles(shapefile1, shapefile2, output_shapefile)
\ No newline at end of file
+    output_file = sys.argv[3]
+    mode = sys.argv[4] if len(sys.argv) > 4 else 'overlay'
+    profiler = start_stage('nutflu')
+    if mode == 'stats':
+        area_statistics(shapefile1, shapefile2, output_file)
+    else:
+        union_shapefiles(shapefile1, shapefile2, output_file)
+    if profiler:
+        profiler.finish()
\ No newline at end of file
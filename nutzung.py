@@ -1,24 +1,25 @@
-import xml.etree.ElementTree as ET
 import shapefile
-import json
-import re
-import codecs
 from shapely.geometry import Polygon, MultiPolygon
 import sys
+from crs import detect_source_epsg
+from outputs import finish_output
+from precision import grid_size, snap, report_slivers
+from nasscan import parse_members
+from codelists import nutzart_label, map_nutzung_codes
+from profiling import start_stage
+
+# Opt-in profiling, None when disabled
+profiler = start_stage('nutzung')
 
 # Input XML file
 input_xml = sys.argv[1]
 
-# Input JSON file for bez_dict
+# Input JSON file for bez_dict, kept for the command line; labels come from codelists.NUTZUNG
 bez_dict_file = sys.argv[2]
 
 # Output shapefile
 output_shapefile = sys.argv[3]
 
-# Load bez_dict from JSON file
-with codecs.open(bez_dict_file, 'r', encoding='utf-8') as f:
-    bez_dict = json.load(f)
-
 # Create shapefile writer
 w = shapefile.Writer(output_shapefile)
 w.autoBalance = 1
@@ -28,9 +29,9 @@ w.field('nutzart', 'C')       # Nutzart as string
 w.field('bez', 'C')           # BEZ as string
 w.field('name', 'C')          # NAME as string
 
-# Parse the XML file
-tree = ET.parse(input_xml)
-root = tree.getroot()
+# Precision grid applied to every polygon
+precision = grid_size()
+slivers = 0
 
 # List of tag names to process
 tags_to_process = [
@@ -41,37 +42,49 @@ tags_to_process = [
     "AX_FlaecheBesondererFunktionalerPraegung", "AX_Bahnverkehr"
 ]
 
+# Parse only the land-use feature members of the XML file
+root = parse_members(input_xml, tags_to_process)
+
+# Group the elements by tag in a single pass over the tree
+elements_by_tag = {f"{{http://www.adv-online.de/namespaces/adv/gid/6.0}}{tag_name}": [] for tag_name in tags_to_process}
+for elem in root.iter():
+    if elem.tag in elements_by_tag:
+        elements_by_tag[elem.tag].append(elem)
+
 # Helper function to extract coordinates and create Polygon
 def extract_polygon(coords_text):
     coords = list(map(float, coords_text.split()))
     return [(coords[i], coords[i+1]) for i in range(0, len(coords), 2)]
 
-# Helper function to format nutzart
-def format_nutzart(tag):
-    # Remove 'AX_' prefix and add spaces before capital letters
-    return ' '.join(re.findall('[A-Z][^A-Z]*', tag[3:]))
-
-# Helper function to extract bez value
-def extract_bez(elem):
+# Helper function to extract the bez attribute and code (funktion, else vegetationsmerkmal)
+def extract_bez_code(elem):
     funktion_elem = elem.find('.//{http://www.adv-online.de/namespaces/adv/gid/6.0}funktion')
     vegetationsmerkmal_elem = elem.find('.//{http://www.adv-online.de/namespaces/adv/gid/6.0}vegetationsmerkmal')
     
     if funktion_elem is not None:
-        return bez_dict.get(funktion_elem.text, "<null>")
+        return 'funktion', funktion_elem.text
     elif vegetationsmerkmal_elem is not None:
-        return bez_dict.get(vegetationsmerkmal_elem.text, "<null>")
+        return 'vegetationsmerkmal', vegetationsmerkmal_elem.text
     else:
-        return "<null>"
+        return None, None
+
+# Collected features; the bez codes are mapped per feature type and attribute afterwards
+features = []
+bez_tags = []
+bez_attributes = []
+bez_codes = []
 
 # Process the elements
 for tag_name in tags_to_process:
-    for elem in root.findall(f".//{{http://www.adv-online.de/namespaces/adv/gid/6.0}}{tag_name}"):
+    # Format nutzart
+    nutzart = nutzart_label(tag_name)
 
-        # Format nutzart
-        nutzart = format_nutzart(tag_name)
+    for elem in elements_by_tag[f"{{http://www.adv-online.de/namespaces/adv/gid/6.0}}{tag_name}"]:
+        if profiler:
+            token = profiler.start()
 
-        # Extract bez
-        bez = extract_bez(elem)
+        # Extract bez code
+        bez_attribute, bez_code = extract_bez_code(elem)
 
         # Extract name
         name_elem = elem.find('.//{http://www.adv-online.de/namespaces/adv/gid/6.0}name')
@@ -84,32 +97,53 @@ for tag_name in tags_to_process:
             for coord_elem in coordinates:
                 polygon_coords.extend(extract_polygon(coord_elem.text))
             
-            # Create a Shapely polygon and fix invalid geometries
+            # Create a Shapely polygon, fix invalid geometries, then snap it to the grid
             try:
                 poly = Polygon(polygon_coords)
                 if not poly.is_valid:
                     poly = poly.buffer(0)
-                
-                if isinstance(poly, Polygon):
-                    w.poly([list(poly.exterior.coords)])
-                elif isinstance(poly, MultiPolygon):
-                    for p in poly.geoms:
-                        w.poly([list(p.exterior.coords)])
-                
-                # Add record to shapefile
-                w.record(nutzart, bez, name)
+                snapped = snap(poly, precision)
+                if snapped.is_empty:
+                    # Nothing to write; only polygons emptied by the grid count as slivers
+                    if not poly.is_empty:
+                        slivers += 1
+                else:
+                    if isinstance(snapped, Polygon):
+                        rings = [list(snapped.exterior.coords)]
+                    elif isinstance(snapped, MultiPolygon):
+                        rings = [list(p.exterior.coords) for p in snapped.geoms]
+                    else:
+                        rings = []
+
+                    features.append((rings, nutzart, name))
+                    bez_tags.append(tag_name)
+                    bez_attributes.append(bez_attribute)
+                    bez_codes.append(bez_code)
             except Exception as e:
                 print(f"Error processing polygon: {e}")
 
+        if profiler:
+            profiler.stop(token, tag_name, elem.get('{http://www.opengis.net/gml/3.2}id'), len(polygon_coords) if coordinates else 0)
+
+# Map the bez codes of all features at once, per feature type and attribute
+bez_values = map_nutzung_codes(bez_tags, bez_attributes, bez_codes, missing="<null>")
+
+for (rings, nutzart, name), bez in zip(features, bez_values):
+    for ring in rings:
+        w.poly([ring])
+
+    # Add record to shapefile
+    w.record(nutzart, bez, name)
+
 # Save shapefile
 w.close()
 
+report_slivers(precision, slivers)
+
 print("Shapefile created successfully.")
 
-# Create .prj file
-prj = open(output_shapefile.replace('.shp', '.prj'), "w")
-epsg = 'PROJCS["ETRS89 / UTM zone 32N",GEOGCS["ETRS89",DATUM["European_Terrestrial_Reference_System_1989",SPHEROID["GRS 1980",6378137,298.257222101,AUTHORITY["EPSG","7019"]],TOWGS84[0,0,0,0,0,0,0],AUTHORITY["EPSG","6258"]],PRIMEM["Greenwich",0,AUTHORITY["EPSG","8901"]],UNIT["degree",0.0174532925199433,AUTHORITY["EPSG","9122"]],AUTHORITY["EPSG","4258"]],PROJECTION["Transverse_Mercator"],PARAMETER["latitude_of_origin",0],PARAMETER["central_meridian",9],PARAMETER["scale_factor",0.9996],PARAMETER["false_easting",500000],PARAMETER["false_northing",0],UNIT["metre",1,AUTHORITY["EPSG","9001"]],AXIS["Easting",EAST],AXIS["Northing",NORTH],AUTHORITY["EPSG","25832"]]'
-prj.write(epsg)
-prj.close()
+# Create .prj and .cpg files with the CRS named in the NAS srsName, spatial index and target CRS copies
+source_epsg = detect_source_epsg(input_xml)
+finish_output(output_shapefile, source_epsg, profiler)
 
 print("Shapefile and .prj file created successfully.")
\ No newline at end of file
@@ -0,0 +1,12 @@
+from crs import DEFAULT_ENCODING, target_epsgs, write_cpg, write_prj, write_reprojected
+from spatial_index import build_index
+
+# Finish a written stage output: .prj and .cpg sidecars, the spatial index sidecar for bbox
+# queries and copies in the additional target CRSs, then dump the stage profile if enabled
+def finish_output(output_shapefile, source_epsg, profiler=None, encoding=DEFAULT_ENCODING):
+    write_prj(output_shapefile, source_epsg)
+    write_cpg(output_shapefile, encoding)
+    build_index(output_shapefile)
+    write_reprojected(output_shapefile, source_epsg, target_epsgs(source_epsg))
+    if profiler:
+        profiler.finish()
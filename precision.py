@@ -0,0 +1,61 @@
+import os
+import numpy as np
+import shapely
+
+# Environment variable holding the precision grid size in CRS units (0.001 = millimetre)
+GRID_SIZE_ENV = 'NAS_GRID_SIZE'
+
+# Read the configured grid size; unset or 0 keeps full double precision
+def grid_size():
+    value = os.environ.get(GRID_SIZE_ENV)
+    return float(value) or None if value else None
+
+# Repair invalid geometries (single, array or GeoSeries) with buffer(0)
+def repair(geometry):
+    if isinstance(geometry, shapely.Geometry):
+        return geometry if geometry.is_valid else geometry.buffer(0)
+    if hasattr(geometry, 'set_precision'):
+        invalid = ~geometry.is_valid
+        if invalid.any():
+            geometry = geometry.copy()
+            geometry[invalid] = geometry[invalid].buffer(0)
+        return geometry
+    geometry = np.array(geometry, dtype=object)
+    invalid = ~shapely.is_valid(geometry)
+    geometry[invalid] = shapely.buffer(geometry[invalid], 0)
+    return geometry
+
+# Snap geometries (single, array or GeoSeries) to the precision grid;
+# set_precision needs valid input, so self-intersecting rings are repaired first
+def snap(geometry, size):
+    if not size:
+        return geometry
+    geometry = repair(geometry)
+    if hasattr(geometry, 'set_precision'):
+        return geometry.set_precision(size)
+    return shapely.set_precision(geometry, size)
+
+# Prefix of the sliver report line, picked up from the stage output by the pipeline runners
+SLIVER_REPORT = 'Precision grid'
+
+# Report how many sliver polygons collapsed while snapping
+def report_slivers(size, removed):
+    if size:
+        print(f"{SLIVER_REPORT} {size}: {removed} sliver polygons removed.")
+
+# Snap the geometries of a GeoDataFrame to the precision grid and drop the ones that collapse;
+# geometries that were already empty are kept, and nothing changes without a grid
+def drop_slivers(gdf, size):
+    if not size:
+        return gdf
+    geometry = gdf.geometry.name
+    snapped = snap(gdf[geometry], size)
+    slivers = snapped.is_empty & ~gdf[geometry].is_empty
+    gdf = gdf.copy()
+    gdf[geometry] = snapped
+    report_slivers(size, int(slivers.sum()))
+    return gdf[~slivers]
+
+# Extract the sliver report lines from the captured output of a stage
+def sliver_reports(output):
+    return [line for line in output.splitlines() if line.startswith(SLIVER_REPORT)]
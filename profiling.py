@@ -0,0 +1,100 @@
+import cProfile
+import heapq
+import json
+import os
+import time
+import tracemalloc
+from collections import defaultdict
+
+# Directory for the profile dumps; profiling is disabled when unset
+PROFILE_ENV = 'NAS_PROFILE'
+PROFILE_DIR = os.environ.get(PROFILE_ENV) or None
+
+# Set to 1 for the allocation tracing pass; tracemalloc slows every allocation down,
+# so it never runs together with the cProfile timing pass
+PROFILE_MEMORY_ENV = 'NAS_PROFILE_MEMORY'
+PROFILE_MEMORY = os.environ.get(PROFILE_MEMORY_ENV, '0') == '1'
+
+# Number of slowest / largest features kept per stage
+TOP_N = 25
+
+class StageProfiler:
+    # Timing pass: cProfile of the whole stage plus seconds per feature type and the top-N slowest features.
+    # Allocation pass: tracemalloc peak bytes per feature type and the top-N largest features.
+    def __init__(self, stage, output_dir, memory=False, top_n=TOP_N):
+        self.stage = stage
+        self.output_dir = output_dir
+        self.memory = memory
+        self.metric = 'bytes' if memory else 'seconds'
+        self.top_n = top_n
+        self.totals = defaultdict(lambda: {'count': 0, self.metric: 0, 'vertices': 0})
+        self.top = []
+        self.start_time = time.perf_counter()
+        if memory:
+            tracemalloc.start()
+        else:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+
+    # Start measuring one feature
+    def start(self):
+        if self.memory:
+            tracemalloc.reset_peak()
+            return tracemalloc.get_traced_memory()[0]
+        return time.perf_counter()
+
+    # Stop measuring one feature: elapsed seconds or peak bytes allocated since start
+    def stop(self, token, feature_type, gml_id, vertices):
+        if self.memory:
+            value = max(0, tracemalloc.get_traced_memory()[1] - token)
+        else:
+            value = time.perf_counter() - token
+        self.add(feature_type, gml_id, value, vertices)
+
+    def add(self, feature_type, gml_id, value, vertices):
+        totals = self.totals[feature_type]
+        totals['count'] += 1
+        totals[self.metric] += value
+        totals['vertices'] += vertices
+
+        entry = (value, gml_id or '', feature_type, vertices)
+        if len(self.top) < self.top_n:
+            heapq.heappush(self.top, entry)
+        else:
+            heapq.heappushpop(self.top, entry)
+
+    def finish(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        if self.memory:
+            tracemalloc.stop()
+            report_file = os.path.join(self.output_dir, f"{self.stage}_memory.json")
+            top_name = 'largest_features'
+        else:
+            self.profile.disable()
+            report_file = os.path.join(self.output_dir, f"{self.stage}_features.json")
+            top_name = 'slowest_features'
+
+            # pstats dump, readable by snakeviz, flameprof or gprof2dot
+            profile_file = os.path.join(self.output_dir, f"{self.stage}.prof")
+            self.profile.dump_stats(profile_file)
+
+        report = {
+            'stage': self.stage,
+            'seconds': time.perf_counter() - self.start_time,
+            'feature_types': dict(sorted(self.totals.items(), key=lambda item: -item[1][self.metric])),
+            top_name: [
+                {'gml_id': gml_id, 'feature_type': feature_type, self.metric: value, 'vertices': vertices}
+                for value, gml_id, feature_type, vertices in sorted(self.top, reverse=True)
+            ]
+        }
+        with open(report_file, 'w') as f:
+            json.dump(report, f, indent=2)
+
+        if self.memory:
+            print(f"Allocation profile of '{self.stage}' saved as '{report_file}'.")
+        else:
+            print(f"Profile of '{self.stage}' saved as '{profile_file}' and '{report_file}'.")
+
+# Start profiling a stage; returns None when profiling is disabled
+def start_stage(stage):
+    return StageProfiler(stage, PROFILE_DIR, PROFILE_MEMORY) if PROFILE_DIR else None
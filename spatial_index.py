@@ -0,0 +1,177 @@
+import mmap
+import struct
+import sys
+from functools import lru_cache
+import numpy as np
+import shapefile
+
+# Sidecar file layout: a fixed header followed by the packed tree nodes, leaves first
+INDEX_SUFFIX = '.str'
+INDEX_MAGIC = b'NASSTR01'
+HEADER = struct.Struct('<8sIIIII')  # magic, node capacity, item count, node count, root start, root count
+NODE_DTYPE = np.dtype([('minx', '<f8'), ('miny', '<f8'), ('maxx', '<f8'), ('maxy', '<f8'),
+                       ('first', '<u4'), ('count', '<u4')])
+NODE_CAPACITY = 16
+
+# Shape types that carry a bounding box / a single point in the .shp record
+BBOX_SHAPE_TYPES = [3, 5, 8, 13, 15, 18, 23, 25, 28, 31]
+POINT_SHAPE_TYPES = [1, 11, 21]
+
+# Path of the index sidecar belonging to a shapefile
+def index_path(shapefile_path):
+    return shapefile_path.replace('.shp', INDEX_SUFFIX)
+
+# Gather one value per byte position; records are only 2-byte aligned, so every alignment
+# gets its own typed view of the bytes instead of a per-byte index array
+def read_values(data, positions, dtype):
+    dtype = np.dtype(dtype)
+    values = np.empty(len(positions), dtype=dtype)
+    alignments = positions % dtype.itemsize
+    for alignment in np.unique(alignments):
+        count = (len(data) - alignment) // dtype.itemsize
+        view = data[alignment:alignment + count * dtype.itemsize].view(dtype)
+        selected = alignments == alignment
+        values[selected] = view[(positions[selected] - alignment) // dtype.itemsize]
+    return values
+
+# Read all record bounding boxes straight from the .shp/.shx bytes
+def read_bboxes(shapefile_path):
+    shx = np.fromfile(shapefile_path.replace('.shp', '.shx'), dtype='>i4', offset=100).reshape(-1, 2)
+    offsets = shx[:, 0].astype(np.int64) * 2 + 8  # skip the 8 byte record header
+    shp = np.memmap(shapefile_path, dtype=np.uint8, mode='r')
+
+    shape_types = read_values(shp, offsets, '<i4')
+    boxes = np.empty((len(offsets), 4), dtype='<f8')
+
+    has_bbox = np.isin(shape_types, BBOX_SHAPE_TYPES)
+    if has_bbox.any():
+        starts = offsets[has_bbox] + 4
+        for column in range(4):  # xmin, ymin, xmax, ymax
+            boxes[has_bbox, column] = read_values(shp, starts + column * 8, '<f8')
+
+    is_point = np.isin(shape_types, POINT_SHAPE_TYPES)
+    if is_point.any():
+        starts = offsets[is_point] + 4
+        for column in range(2):  # x, y
+            boxes[is_point, column] = boxes[is_point, column + 2] = read_values(shp, starts + column * 8, '<f8')
+
+    # Null shapes have no extent and are left out of the index
+    valid = has_bbox | is_point
+    return boxes[valid], np.flatnonzero(valid)
+
+# Sort-Tile-Recursive ordering of one tree level
+def sort_tiles(nodes, node_capacity):
+    count = len(nodes)
+    leaf_count = -(-count // node_capacity)
+    slice_size = int(np.ceil(np.sqrt(leaf_count))) * node_capacity
+
+    cx = (nodes['minx'] + nodes['maxx']) / 2
+    cy = (nodes['miny'] + nodes['maxy']) / 2
+    by_x = np.argsort(cx, kind='stable')
+    slice_ids = np.arange(count) // slice_size
+    order = by_x[np.lexsort((cy[by_x], slice_ids))]
+    return nodes[order]
+
+# Pack consecutive nodes of one level into their parent nodes
+def pack_level(nodes, level_offset, node_capacity):
+    starts = np.arange(0, len(nodes), node_capacity)
+    parents = np.empty(len(starts), dtype=NODE_DTYPE)
+    parents['minx'] = np.minimum.reduceat(nodes['minx'], starts)
+    parents['miny'] = np.minimum.reduceat(nodes['miny'], starts)
+    parents['maxx'] = np.maximum.reduceat(nodes['maxx'], starts)
+    parents['maxy'] = np.maximum.reduceat(nodes['maxy'], starts)
+    parents['first'] = level_offset + starts
+    parents['count'] = np.minimum(node_capacity, len(nodes) - starts)
+    return parents
+
+# Build the packed STR tree; leaves have count 0 and point to the record id
+def build_tree(boxes, ids, node_capacity=NODE_CAPACITY):
+    nodes = np.empty(len(ids), dtype=NODE_DTYPE)
+    nodes['minx'], nodes['miny'], nodes['maxx'], nodes['maxy'] = boxes.T
+    nodes['first'] = ids
+    nodes['count'] = 0
+
+    levels = []
+    level_offset = 0
+    while True:
+        nodes = sort_tiles(nodes, node_capacity) if len(nodes) > 1 else nodes
+        levels.append(nodes)
+        if len(nodes) <= 1:
+            break
+        parents = pack_level(nodes, level_offset, node_capacity)
+        level_offset += len(nodes)
+        nodes = parents
+
+    return np.concatenate(levels), level_offset, len(levels[-1])
+
+# Build and write the index sidecar for a shapefile
+def build_index(shapefile_path, node_capacity=NODE_CAPACITY):
+    boxes, ids = read_bboxes(shapefile_path)
+    if len(ids):
+        tree, root_start, root_count = build_tree(boxes, ids, node_capacity)
+    else:
+        tree, root_start, root_count = np.empty(0, dtype=NODE_DTYPE), 0, 0
+
+    # Release cached handles of the old files before overwriting them (an open mmap blocks this on Windows)
+    open_index.cache_clear()
+    open_reader.cache_clear()
+
+    sidecar = index_path(shapefile_path)
+    with open(sidecar, 'wb') as f:
+        f.write(HEADER.pack(INDEX_MAGIC, node_capacity, len(ids), len(tree), root_start, root_count))
+        f.write(tree.tobytes())
+    return sidecar
+
+# Memory-map an index sidecar once per process
+@lru_cache(maxsize=None)
+def open_index(shapefile_path):
+    with open(index_path(shapefile_path), 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, _, _, node_count, root_start, root_count = HEADER.unpack_from(mm, 0)
+    if magic != INDEX_MAGIC:
+        raise ValueError(f"Not a spatial index file: {index_path(shapefile_path)}")
+    nodes = np.frombuffer(mm, dtype=NODE_DTYPE, count=node_count, offset=HEADER.size)
+    return nodes, root_start, root_count
+
+# Open a shapefile reader once per process
+@lru_cache(maxsize=None)
+def open_reader(shapefile_path):
+    return shapefile.Reader(shapefile_path)
+
+# Find the record ids whose bounding box intersects bbox (minx, miny, maxx, maxy)
+def query_ids(layer, bbox):
+    minx, miny, maxx, maxy = bbox
+    nodes, root_start, root_count = open_index(layer)
+
+    found = []
+    frontier = np.arange(root_start, root_start + root_count)
+    while frontier.size:
+        candidates = nodes[frontier]
+        hits = candidates[(candidates['minx'] <= maxx) & (candidates['maxx'] >= minx) &
+                          (candidates['miny'] <= maxy) & (candidates['maxy'] >= miny)]
+        is_leaf = hits['count'] == 0
+        found.append(hits['first'][is_leaf])
+
+        # Expand the inner nodes into their contiguous child ranges
+        inner = hits[~is_leaf]
+        counts = inner['count'].astype(np.int64)
+        starts = inner['first'].astype(np.int64) - (np.cumsum(counts) - counts)
+        frontier = np.repeat(starts, counts) + np.arange(counts.sum())
+
+    return np.sort(np.concatenate(found)) if found else np.empty(0, dtype='<u4')
+
+# Return the shape records of a layer that intersect bbox
+def query(layer, bbox):
+    reader = open_reader(layer)
+    return [reader.shapeRecord(int(i)) for i in query_ids(layer, bbox)]
+
+# Example usage
+if __name__ == "__main__":
+    layer = sys.argv[1]
+    if len(sys.argv) == 6:
+        records = query(layer, [float(x) for x in sys.argv[2:6]])
+        for record in records:
+            print(record.record.as_dict())
+        print(f"{len(records)} records found.")
+    else:
+        print(f"Spatial index written to '{build_index(layer)}'.")
@@ -0,0 +1,153 @@
+import gzip
+import json
+import multiprocessing as mp
+import os
+import sqlite3
+import sys
+import time
+import geopandas as gpd
+import numpy as np
+import shapely
+from shapely import STRtree
+import mapbox_vector_tile
+from crs import read_cpg
+
+# Tile pyramid settings
+MIN_ZOOM = 12
+MAX_ZOOM = 16
+EXTENT = 4096
+BUFFER = 64  # tile buffer in tile units, avoids seams at tile edges
+WEB_MERCATOR_HALF = 20037508.342789244
+SOURCE_EPSG = 25832
+
+# Simplified layers of the current zoom level, set in every worker
+worker_layers = {}
+
+# Width of one tile in Web Mercator metres
+def tile_size(zoom):
+    return 2 * WEB_MERCATOR_HALF / 2 ** zoom
+
+# Web Mercator bounds of an XYZ tile
+def tile_bounds(zoom, x, y):
+    size = tile_size(zoom)
+    minx = -WEB_MERCATOR_HALF + x * size
+    maxy = WEB_MERCATOR_HALF - y * size
+    return (minx, maxy - size, minx + size, maxy)
+
+# All XYZ tiles covering the given Web Mercator bounds
+def tiles_for_bounds(zoom, bounds):
+    size = tile_size(zoom)
+    last = 2 ** zoom - 1
+    min_x = max(0, int((bounds[0] + WEB_MERCATOR_HALF) // size))
+    max_x = min(last, int((bounds[2] + WEB_MERCATOR_HALF) // size))
+    min_y = max(0, int((WEB_MERCATOR_HALF - bounds[3]) // size))
+    max_y = min(last, int((WEB_MERCATOR_HALF - bounds[1]) // size))
+    return [(zoom, x, y) for x in range(min_x, max_x + 1) for y in range(min_y, max_y + 1)]
+
+# Read a layer and reproject it to Web Mercator; pyshp outputs are UTF-8 even without a .cpg
+def load_layer(shapefile_path):
+    gdf = gpd.read_file(shapefile_path, encoding=read_cpg(shapefile_path))
+    if gdf.crs is None:
+        gdf.set_crs(epsg=SOURCE_EPSG, inplace=True)
+    gdf = gdf[gdf.geometry.notna() & ~gdf.is_empty].to_crs(epsg=3857)
+
+    # Tile properties without empty values
+    attributes = gdf.drop(columns='geometry').to_dict('records')
+    properties = [{key: value for key, value in row.items() if value is not None and value == value}
+                  for row in attributes]
+    return gdf.geometry.to_numpy(), properties
+
+# Simplify every layer to one pixel of the given zoom level
+def simplify_layers(layers, zoom):
+    tolerance = tile_size(zoom) / EXTENT
+    return {name: (shapely.simplify(geoms, tolerance, preserve_topology=True), properties)
+            for name, (geoms, properties) in layers.items()}
+
+# Worker initializer: keep the zoom level's layers and build their trees
+def init_worker(layers):
+    worker_layers.clear()
+    for name, (geoms, properties) in layers.items():
+        worker_layers[name] = (geoms, STRtree(geoms), properties)
+
+# Clip, encode and compress a single tile
+def render_tile(tile):
+    zoom, x, y = tile
+    bounds = tile_bounds(zoom, x, y)
+    margin = tile_size(zoom) * BUFFER / EXTENT
+    clip_bounds = (bounds[0] - margin, bounds[1] - margin, bounds[2] + margin, bounds[3] + margin)
+
+    encoded_layers = []
+    for name, (geoms, tree, properties) in worker_layers.items():
+        idx = tree.query(shapely.box(*clip_bounds))
+        if not len(idx):
+            continue
+        clipped = shapely.clip_by_rect(geoms[idx], *clip_bounds)
+        features = [{'geometry': geom, 'properties': properties[i]}
+                    for i, geom in zip(idx, clipped) if not geom.is_empty]
+        if features:
+            encoded_layers.append({'name': name, 'features': features})
+
+    if not encoded_layers:
+        return zoom, x, y, None
+    data = mapbox_vector_tile.encode(encoded_layers, default_options={'quantize_bounds': bounds, 'extents': EXTENT})
+    return zoom, x, y, gzip.compress(data)
+
+# Create an empty MBTiles database
+def create_mbtiles(output_mbtiles):
+    if os.path.exists(output_mbtiles):
+        os.remove(output_mbtiles)
+    db = sqlite3.connect(output_mbtiles)
+    db.execute('CREATE TABLE metadata (name TEXT, value TEXT)')
+    db.execute('CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB)')
+    db.execute('CREATE UNIQUE INDEX tile_index ON tiles (zoom_level, tile_column, tile_row)')
+    return db
+
+# Build the vector tile pyramid for the given shapefiles
+def export_tiles(output_mbtiles, shapefiles, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM):
+    start_time = time.time()
+    layers = {os.path.splitext(os.path.basename(path))[0]: load_layer(path) for path in shapefiles}
+    layer_bounds = [shapely.total_bounds(geoms) for geoms, _ in layers.values() if len(geoms)]
+    if not layer_bounds:
+        print("No features to export.")
+        return
+    layer_bounds = np.array(layer_bounds)
+    bounds = (*layer_bounds[:, :2].min(axis=0), *layer_bounds[:, 2:].max(axis=0))
+
+    db = create_mbtiles(output_mbtiles)
+    tile_count = 0
+    for zoom in range(min_zoom, max_zoom + 1):
+        # Render the tiles of one zoom level in parallel across cores
+        with mp.Pool(initializer=init_worker, initargs=(simplify_layers(layers, zoom),)) as pool:
+            for zoom_level, x, y, data in pool.imap_unordered(render_tile, tiles_for_bounds(zoom, bounds), chunksize=32):
+                if data is not None:
+                    # MBTiles uses TMS row numbering
+                    db.execute('INSERT INTO tiles VALUES (?, ?, ?, ?)', (zoom_level, x, 2 ** zoom_level - 1 - y, data))
+                    tile_count += 1
+        db.commit()
+
+    # Metadata for web map clients
+    lon_lat_bounds = gpd.GeoSeries([shapely.box(*bounds)], crs=3857).to_crs(epsg=4326).total_bounds
+    vector_layers = [{'id': name, 'fields': {key: 'String' for row in properties[:1] for key in row},
+                      'minzoom': min_zoom, 'maxzoom': max_zoom}
+                     for name, (_, properties) in layers.items()]
+    metadata = {
+        'name': os.path.splitext(os.path.basename(output_mbtiles))[0],
+        'format': 'pbf',
+        'minzoom': str(min_zoom),
+        'maxzoom': str(max_zoom),
+        'bounds': ','.join(f"{value:.6f}" for value in lon_lat_bounds),
+        'center': f"{(lon_lat_bounds[0] + lon_lat_bounds[2]) / 2:.6f},{(lon_lat_bounds[1] + lon_lat_bounds[3]) / 2:.6f},{min_zoom}",
+        'json': json.dumps({'vector_layers': vector_layers})
+    }
+    db.executemany('INSERT INTO metadata VALUES (?, ?)', metadata.items())
+    db.commit()
+    db.close()
+
+    end_time = time.time()
+    print(f"Vector tiles saved as '{output_mbtiles}' ({tile_count} tiles). Time taken: {end_time - start_time:.2f} seconds.")
+
+# Example usage
+if __name__ == "__main__":
+    output_mbtiles = sys.argv[1]
+    shapefiles = sys.argv[2:]
+    export_tiles(output_mbtiles, shapefiles)
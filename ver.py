@@ -1,9 +1,16 @@
 import geopandas as gpd
-from shapely.ops import unary_union
-import xml.etree.ElementTree as ET
+from shapely import union_all
 import shapefile
 from shapely.geometry import Polygon, MultiPolygon
 import sys
+from crs import epsg_from_prj
+from outputs import finish_output
+from precision import grid_size, drop_slivers
+from nasscan import parse_members
+from profiling import start_stage
+
+# Opt-in profiling, None when disabled
+profiler = start_stage('ver')
 
 # Input shapefile
 input_shapefile = sys.argv[1]
@@ -30,10 +37,12 @@ if not invalid_geometries.empty:
     print(f"Invalid geometries found: {len(invalid_geometries)}. Attempting to fix them.")
 
 # Fix invalid geometries using buffer(0)
+precision = grid_size()
 gdf['geometry'] = gdf['geometry'].buffer(0)
+gdf = drop_slivers(gdf, precision)
 
-# Combine all polygons into one using unary_union
-merged_polygon = unary_union(gdf.geometry)
+# Combine all polygons into one using union_all
+merged_polygon = union_all(gdf.geometry, grid_size=precision)
 
 # Step 1.2: Check if merged_polygon is a MultiPolygon or a single Polygon
 if isinstance(merged_polygon, Polygon):
@@ -50,9 +59,8 @@ w.field('schluessel', 'C')   # Schlüssel value
 w.field('uebaname', 'C')     # Uebaname value
 w.field('ueobjekt', 'C')     # Ueobjekt value
 
-# Parse the XML file
-tree = ET.parse(input_xml)
-root = tree.getroot()
+# Parse only the administrative unit feature members of the XML file
+root = parse_members(input_xml, ['AX_Gemeinde', 'AX_Bundesland', 'AX_Regierungsbezirk', 'AX_KreisRegion'])
 
 # Namespace map
 ns = {'gml': 'http://www.opengis.net/gml/3.2',
@@ -139,21 +147,9 @@ for tag in tags:
 for boundary in exterior_boundaries:
     w.poly([list(boundary.coords)])
 
-# Define spatial reference (projection file)
-with open(output_shapefile.replace('.shp', '.prj'), 'w') as prj_file:
-    prj_file.write('PROJCS["ETRS89 / UTM zone 32N",'
-                   'GEOGCS["ETRS89",'
-                   'DATUM["European_Terrestrial_Reference_System_1989",'
-                   'SPHEROID["GRS 1980",6378137,298.257222101]],'
-                   'PRIMEM["Greenwich",0],'
-                   'UNIT["degree",0.0174532925199433]],'
-                   'PROJECTION["Transverse_Mercator"],'
-                   'PARAMETER["latitude_of_origin",0],'
-                   'PARAMETER["central_meridian",9],'
-                   'PARAMETER["scale_factor",0.9996],'
-                   'PARAMETER["false_easting",500000],'
-                   'PARAMETER["false_northing",0],'
-                   'UNIT["metre",1]]')
-
 # Save the shapefile
-w.close()
\ No newline at end of file
+w.close()
+
+# Define spatial reference (projection file) from the input shapefile, spatial index and target CRS copies
+source_epsg = epsg_from_prj(input_shapefile)
+finish_output(output_shapefile, source_epsg, profiler)
\ No newline at end of file